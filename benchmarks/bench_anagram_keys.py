@@ -0,0 +1,49 @@
+"""
+Compare the two anagram key schemes (prime products and packed counts).
+
+Usage (from the top of the repository):
+    python -m benchmarks.bench_anagram_keys WORDLIST [RACK]
+"""
+import sys
+import time
+
+from puzzle_utils import anagrams as ana
+
+
+def timed(label, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    print(f'  {label:<28} {time.perf_counter() - start:8.3f}s')
+    return result
+
+
+def main(path, rack='puzzleutilities'):
+    with open(path) as f:
+        words = [line.strip().upper() for line in f]
+    print(f'{len(words)} words; rack {rack!r}')
+
+    for scheme, difference in [
+        ('primes', lambda big, small: divmod(big, small)[1] == 0),
+        ('counts', lambda big, small: ana.counts_difference(big, small)
+         is not None),
+    ]:
+        print(scheme)
+        to_key = ana.SCHEMES[scheme][0]
+        keys = timed('keys for every word', lambda: [to_key(w) for w in words])
+        timed('hashing every key', lambda: {key: None for key in keys})
+        bits = sum(key.bit_length() for key in keys) / len(keys)
+        print(f'  {"average key size":<28} {bits:8.1f} bits')
+
+        rack_key = to_key(rack)
+        found = timed('subanagram test (scan)', lambda: [
+            key for key in keys if difference(rack_key, key)
+        ])
+        anadict = timed('from_path', ana.Anadict.from_path, path, scheme)
+        timed('build index', anadict.reindex)
+        indexed = timed('subanagram test (index)', anadict.subanagram_keys,
+                        rack)
+        assert len(set(found)) == len(indexed)
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,46 @@
+"""
+Compare Grid and CompactGrid on a large grid: memory, and the time taken by
+the common retrieval methods.
+
+Usage (from the top of the repository):
+    python -m benchmarks.bench_grid [SIZE]
+"""
+import random
+import sys
+import time
+import tracemalloc
+
+from puzzle_utils import grid
+
+
+def timed(label, function):
+    start = time.perf_counter()
+    result = function()
+    print(f'  {label:<28} {time.perf_counter() - start:8.3f}s')
+    return result
+
+
+def main(size=1000):
+    size = int(size)
+    text = '\n'.join(''.join(random.choice('#.') for _ in range(size))
+                     for _ in range(size))
+    print(f'{size} x {size} grid')
+
+    for cls in (grid.Grid, grid.CompactGrid):
+        print(cls.__name__)
+        tracemalloc.start()
+        g = timed('from_text', lambda: cls.from_text(text))
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f'  {"memory":<28} {memory / 2 ** 20:8.1f}MB')
+
+        timed('to_text', g.to_text)
+        timed('every row', lambda: [g.get_row(r) for r in range(g.rows)])
+        timed('every column',
+              lambda: [g.get_column(c) for c in range(g.columns)])
+        timed('every cell\'s neighbors',
+              lambda: [g.get_neighbors(coord, diagonals=True) for coord in g])
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,68 @@
+"""
+Time primality testing and factorization on the kinds of numbers that are
+hard in different ways: semiprimes (two large factors), prime powers, smooth
+numbers (many small factors), and large primes, plus bulk work on small
+numbers that the sieve covers.
+
+Usage (from the top of the repository):
+    python -m benchmarks.bench_primes [COUNT]
+"""
+import random
+import sys
+import time
+from math import prod
+
+import puzzle_utils as util
+
+
+def timed(label, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    print(f'  {label:<36} {time.perf_counter() - start:8.3f}s')
+    return result
+
+
+def random_prime(digits):
+    while True:
+        num = random.randrange(10 ** (digits - 1), 10 ** digits)
+        if util.isprime(num):
+            return num
+
+
+def check(numbers):
+    for num in numbers:
+        factors = util.primefactor(num)
+        assert prod(factors) == num and all(map(util.isprime, factors))
+
+
+def main(count=20):
+    count = int(count)
+    random.seed(0)
+    print(f'{count} numbers of each kind')
+
+    print('small numbers (sieve)')
+    timed('primes_up_to(10 ** 7)', util.primes_up_to, 10 ** 7)
+    timed('isprime_many(range(10 ** 6))', util.isprime_many, range(10 ** 6))
+    timed('primefactor, 2 .. 10 ** 6',
+          lambda: [util.primefactor(n) for n in range(2, 10 ** 6)])
+
+    print('large numbers (Miller-Rabin and Pollard rho)')
+    for digits in (10, 20, 30):
+        primes = [random_prime(digits) for _ in range(count)]
+        timed(f'isprime, {digits}-digit primes',
+              lambda: [util.isprime(p) for p in primes])
+    for digits in (6, 9, 12):
+        semiprimes = [random_prime(digits) * random_prime(digits)
+                      for _ in range(count)]
+        timed(f'primefactor, {digits}x{digits}-digit semiprimes',
+              check, semiprimes)
+    powers = [random_prime(random.randrange(5, 10)) ** random.randrange(2, 6)
+              for _ in range(count)]
+    timed('primefactor, prime powers', check, powers)
+    smooth = [prod(random.choices(util.primes_up_to(10 ** 4), k=20))
+              for _ in range(count)]
+    timed('primefactor, 10 ** 4-smooth numbers', check, smooth)
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
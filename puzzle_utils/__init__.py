@@ -1,9 +1,25 @@
+import heapq
 import itertools
-import operator
 import re
-from collections import defaultdict
-from functools import reduce
-from math import ceil
+from array import array
+from collections import Counter, defaultdict
+from math import ceil, gcd, isqrt, lcm, prod
+
+# NumPy is optional (it just makes bulk conversion faster), and slow to
+# import, so it's only imported the first time it could be used; until then,
+# this is False
+np = False
+
+
+def _numpy():
+    # Return NumPy (importing it if need be), or None if it isn't installed
+    global np
+    if np is False:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+    return np
 
 
 # Language Functions
@@ -50,8 +66,8 @@ def histogram(text, printable=True):
     """
     histodict = defaultdict(list)
 
-    for character in sorted(set(text)):
-        histodict[text.count(character)].append(character)
+    for character, count in sorted(Counter(text).items()):
+        histodict[count].append(character)
     if not printable:
         return dict(histodict)
 
@@ -84,22 +100,348 @@ def get_enumeration(answer, show_capitals=False):
 
 # Math Functions
 
+_DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+# For each base that's been used, every two-digit string, in order
+_DIGIT_PAIRS = {}
+# Bases that format() does in C
+_FORMATS = {2: 'b', 8: 'o', 16: 'X'}
+# Numbers up to this many bits are converted digit by digit; bigger ones are
+# split in half (by a power of the base) first, so that most of the division
+# is by big numbers rather than one digit at a time
+_SPLIT_BITS = 1024
+# Below this many numbers, NumPy isn't worth setting up
+_NUMPY_MINIMUM = 100
+
+
+def _check_base(base):
+    if base < 2 or base > 36:
+        raise ValueError('Invalid base')
+
+
+def _convert_small(number, base):
+    # Two digits at a time, from a table of every pair of digits
+    if base not in _DIGIT_PAIRS:
+        _DIGIT_PAIRS[base] = [a + b for a in _DIGITS[:base]
+                              for b in _DIGITS[:base]]
+    pairs = _DIGIT_PAIRS[base]
+    square = base * base
+    result = ''
+    while number >= square:
+        result = pairs[number % square] + result
+        number //= square
+    result = pairs[number] + result
+    # Only the first pair can start with a zero
+    return result[1:] if result[0] == '0' else result
+
+
+def _convert(number, base, powers):
+    # binarize() for a nonnegative int, with a list of base ** (2 ** i) that
+    # grows as needed
+    if number.bit_length() <= _SPLIT_BITS:
+        return str(number) if base == 10 else _convert_small(number, base)
+    i = 0
+    while True:
+        if i == len(powers):
+            powers.append(powers[-1] ** 2)
+        if powers[i] ** 2 > number:
+            break
+        i += 1
+    high, low = divmod(number, powers[i])
+    return (_convert(high, base, powers) +
+            _convert(low, base, powers).rjust(2 ** i, '0'))
+
+
 def binarize(number, base=2):
     """
     Takes a number and optionally a base (default 2), and returns a string that
     represents that number in that base.  `base` must be between 2 and 36
     inclusive.
     """
-    if base < 2 or base > 36:
-        raise ValueError('Invalid base')
+    _check_base(base)
     number = int(abs(number))   # gives screwy results for bad inputs
-    if number == 0:
-        return '0'
-    result = ''
-    while number:
-        result = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'[number % base] + result
-        number = number // base
-    return result
+    if base in _FORMATS:
+        return format(number, _FORMATS[base])
+    if number.bit_length() > _SPLIT_BITS:
+        return _convert(number, base, [base])
+    if base == 10:
+        return str(number)
+    return _convert_small(number, base)
+
+
+def binarize_many(numbers, base=2):
+    """
+    Like binarize() for each of a list of numbers.  With NumPy installed,
+    big batches of numbers that fit in 64 bits have their digits extracted
+    all at once.
+    """
+    _check_base(base)
+    numbers = [int(abs(number)) for number in numbers]
+    if (len(numbers) < _NUMPY_MINIMUM or base in _FORMATS
+            or _numpy() is None):
+        return [binarize(number, base) for number in numbers]
+    try:
+        values = np.array(numbers, dtype=np.uint64)
+    except OverflowError:
+        return [binarize(number, base) for number in numbers]
+
+    # A row of digits per number, as many as the biggest one needs
+    width = len(_convert(max(numbers), base, [base]))
+    digits = np.zeros((len(numbers), width), dtype=np.uint8)
+    for column in range(width - 1, -1, -1):
+        digits[:, column] = values % base
+        values //= base
+    # Leading zeros are dropped (but zero itself is "0")
+    nonzero = digits != 0
+    starts = np.where(nonzero.any(axis=1), nonzero.argmax(axis=1), width - 1)
+    text = np.frombuffer(_DIGITS.encode(), dtype=np.uint8)[digits].tobytes()
+    return [text[i * width + start:(i + 1) * width].decode()
+            for i, start in enumerate(starts.tolist())]
+
+
+def unbinarize(text, base=2):
+    """
+    The inverse of binarize(): turn a string of digits in the given base
+    back into a number (as int() does, but for any length of string).
+    """
+    _check_base(base)
+    return _parse(text.strip(), base)
+
+
+def _parse(text, base):
+    # int() refuses to parse very long strings in most bases, since it's
+    # quadratic; splitting them in half keeps the pieces short (and the
+    # multiplication and addition that put them back together are cheap)
+    if len(text) <= 4000 or base & (base - 1) == 0:
+        return int(text, base)
+    middle = len(text) // 2
+    low = text[middle:]
+    return (_parse(text[:middle], base) * base ** len(low) +
+            _parse(low, base))
+
+
+def unbinarize_many(texts, base=2):
+    """
+    Like unbinarize() for each of a list of strings.
+    """
+    _check_base(base)
+    return [_parse(text.strip(), base) for text in texts]
+
+
+class _Sieve:
+    """
+    A table of the smallest prime factor of every number below `size`,
+    grown as needed (up to `limit`), so that primality tests and
+    factorizations of small numbers are lookups.  A bytearray marks which
+    numbers are prime, for listing primes quickly.
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.size = 2
+        # Zero for primes (and 0 and 1), which have nothing smaller to list
+        self.smallest = array('I', [0, 0])
+        self.is_prime = bytearray(2)
+
+    def grow(self, size):
+        """
+        Extend the tables to cover every number below `size` (or `limit`,
+        if that's smaller), at least doubling them if they grow at all.
+        """
+        size = min(max(size, 2 * self.size), self.limit)
+        if size <= self.size:
+            return
+        # Sieving the new segment takes the primes up to its square root
+        base = isqrt(size - 1)
+        if base >= self.size:
+            self.grow(base + 1)
+        start = self.size
+        self.smallest.extend(array('I', [0]) * (size - start))
+        self.is_prime.extend(b'\x01' * (size - start))
+        # Largest prime first, so that the smallest prime factor of each
+        # number is the one left behind
+        for p in reversed(self.primes(2, base + 1)):
+            first = max(p * p, -(-start // p) * p)
+            count = len(range(first, size, p))
+            if count:
+                self.smallest[first::p] = array('I', [p]) * count
+                self.is_prime[first::p] = bytes(count)
+        self.size = size
+
+    def covers(self, num):
+        """
+        Return whether `num` is (or can be, by growing) in the tables.
+        """
+        if num < self.size:
+            return True
+        if num < self.limit:
+            self.grow(num + 1)
+            return True
+        return False
+
+    def primes(self, start, stop):
+        """
+        Return a list of the primes from `start` up to (not including)
+        `stop`, which must not be past the tables' size.
+        """
+        return list(itertools.compress(range(start, stop),
+                                       self.is_prime[start:stop]))
+
+
+# About four million, for about 20MB of tables
+SIEVE_LIMIT = 2 ** 22
+_SIEVE = _Sieve(SIEVE_LIMIT)
+
+
+def set_sieve_limit(limit):
+    """
+    Set how large the table behind isprime(), primefactor() and the like
+    can grow (by default, SIEVE_LIMIT).  Numbers beyond it are handled more
+    slowly without the table.
+    """
+    global _SIEVE
+    _SIEVE = _Sieve(max(limit, 2))
+
+
+def primes_up_to(num):
+    """
+    Return a list of all the primes up to and including `num`.
+    """
+    if num < 2:
+        return []
+    if _SIEVE.covers(num):
+        return _SIEVE.primes(2, num + 1)
+
+    # Beyond the table, sieve a block at a time using the primes in it
+    _SIEVE.grow(_SIEVE.limit)
+    base = primes_up_to(isqrt(num))
+    primes = _SIEVE.primes(2, _SIEVE.size)
+    segment = 2 ** 18
+    for start in range(_SIEVE.size, num + 1, segment):
+        stop = min(start + segment, num + 1)
+        is_prime = bytearray(b'\x01') * (stop - start)
+        for p in base:
+            if p * p >= stop:
+                break
+            first = max(p * p, -(-start // p) * p) - start
+            is_prime[first::p] = bytes(len(range(first, stop - start, p)))
+        primes.extend(itertools.compress(range(start, stop), is_prime))
+    return primes
+
+
+def _as_integer(num):
+    # Whole numbers given as floats (12.0, say) are accepted, as they always
+    # have been, but the sieve can only be indexed by ints
+    if isinstance(num, int):
+        return num
+    if num != int(num):
+        raise ValueError(f'Not an integer: {num}')
+    return int(num)
+
+
+def isprime_many(numbers):
+    """
+    Given an iterable of numbers, return a list of whether each is prime.
+    """
+    numbers = [_as_integer(num) for num in numbers]
+    if numbers:
+        _SIEVE.covers(min(max(numbers), _SIEVE.limit - 1))
+    return [isprime(num) for num in numbers]
+
+
+# Numbers past the sieve are trial-divided by the primes below this first,
+# which catches most factors cheaply
+_TRIAL_DIVISION_LIMIT = 1000
+# Miller-Rabin with the primes up to 41 as bases is correct for every number
+# below this one (which is the first composite to pass them all); above it,
+# more bases are used, and while a composite that passes them all is possible
+# in principle, none is known
+_MILLER_RABIN_BOUND = 3317044064679887385961981
+_MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+_MORE_MILLER_RABIN_BASES = _MILLER_RABIN_BASES + (43, 47, 53, 59, 61, 67, 71)
+
+
+def _miller_rabin(num):
+    # Whether an odd number, with no factors below _TRIAL_DIVISION_LIMIT,
+    # is (as far as the bases can tell) prime
+    d = num - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    if num < _MILLER_RABIN_BOUND:
+        bases = _MILLER_RABIN_BASES
+    else:
+        bases = _MORE_MILLER_RABIN_BASES
+    for base in bases:
+        x = pow(base, d, num)
+        if x == 1 or x == num - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % num
+            if x == num - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _pollard_brent(num):
+    """
+    Find a nontrivial factor of an odd composite number by Brent's variant
+    of Pollard's rho method, which finds a factor p in about sqrt(p) steps.
+    """
+    for c in itertools.count(1):
+        y, r, q, g = 2, 1, 1, 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % num
+            k = 0
+            while k < r and g == 1:
+                # Multiply differences together and only take a gcd now and
+                # then, since gcds are the expensive part
+                saved = y
+                for _ in range(min(128, r - k)):
+                    y = (y * y + c) % num
+                    q = q * abs(x - y) % num
+                g = gcd(q, num)
+                k += 128
+            r *= 2
+        if g == num:
+            # The batch overshot; go back over it one step at a time
+            g = 1
+            while g == 1:
+                saved = (saved * saved + c) % num
+                g = gcd(abs(x - saved), num)
+        if g != num:
+            return g
+
+
+def _integer_root(num, k):
+    # The largest integer whose kth power is at most num, by Newton's method
+    root = 1 << -(-num.bit_length() // k)
+    while True:
+        better = ((k - 1) * root + num // root ** (k - 1)) // k
+        if better >= root:
+            return root
+        root = better
+
+
+def _large_primefactors(num, primefactors):
+    # Add the prime factors of `num`, which has no factors below
+    # _TRIAL_DIVISION_LIMIT, to `primefactors` (in no particular order)
+    if num < _SIEVE.size or _SIEVE.covers(num):
+        primefactors.extend(primefactor(num))
+    elif _miller_rabin(num):
+        primefactors.append(num)
+    else:
+        # Rho is slow to split perfect powers, but they're easy to spot
+        for k in primes_up_to(num.bit_length()):
+            root = _integer_root(num, k)
+            if root ** k == num:
+                for _ in range(k):
+                    _large_primefactors(root, primefactors)
+                return
+        divisor = _pollard_brent(num)
+        _large_primefactors(divisor, primefactors)
+        _large_primefactors(num // divisor, primefactors)
 
 
 def primefactor(num):
@@ -109,16 +451,29 @@ def primefactor(num):
     >>> primefactor(5551212)
     [2, 2, 3, 73, 6337]
     """
+    num = _as_integer(num)
+    if num < 2:
+        return [num]
     primefactors = []
-    n = 2
-    while n <= num ** .5 + 1:
-        while not num % n:
-            num //= n
-            primefactors.append(n)
-            if num == 1:
-                return primefactors
-        n += (1 if n == 2 else 2)
-    primefactors.append(num)
+    if not _SIEVE.covers(num):
+        # Too big for the table: divide out the small primes, then split
+        # what's left with Pollard's rho until the pieces are prime (or
+        # small enough to look up)
+        for n in primes_up_to(_TRIAL_DIVISION_LIMIT):
+            while not num % n:
+                num //= n
+                primefactors.append(n)
+        if num > 1:
+            _large_primefactors(num, primefactors)
+            primefactors.sort()
+        return primefactors
+
+    smallest = _SIEVE.smallest
+    while smallest[num]:
+        primefactors.append(smallest[num])
+        num //= smallest[num]
+    if num > 1 or not primefactors:
+        primefactors.append(num)
     return primefactors
 
 
@@ -127,38 +482,178 @@ def isprime(num):
     Returns True if num is prime, False otherwise.  Faster than primefactor
     if you just need a yes-or-no.
     """
+    num = _as_integer(num)
     if num < 2:
         return False
-    if num > 2 and not num % 2:
-        return False
-    for k in range(3, int(num ** .5) + 1, 2):
+    if num < _SIEVE.size or _SIEVE.covers(num):
+        return bool(_SIEVE.is_prime[num])
+    for k in primes_up_to(_TRIAL_DIVISION_LIMIT):
         if not num % k:
-            return False
-    return True
+            return num == k
+    return _miller_rabin(num)
 
 
-def factor(n):
-    pfs = primefactor(n)
-    pf_and_es = [(x, pfs.count(x)) for x in set(pfs)]
-    factors = []
-    powerlist = [[pf ** n for n in range(ex + 1)] for pf, ex in pf_and_es]
-    for p in itertools.product(*powerlist):
-        factors.append(reduce(operator.mul, p))
-    factors.sort()
-    return factors
+def factorization(num):
+    """
+    Given a positive integer, return its prime factorization as a dict from
+    each prime to its exponent (increasing by prime).  This can be passed
+    as `factors` to the functions below, to avoid factoring a number twice.
+
+    >>> factorization(5551212)
+    {2: 2, 3: 1, 73: 1, 6337: 1}
+    """
+    if num < 1:
+        raise ValueError(f'Not a positive integer: {num}')
+    if num == 1:
+        return {}
+    return dict(Counter(primefactor(num)))
+
+
+def factor(n, factors=None):
+    """
+    Given a positive integer, return a list of all its divisors, in
+    increasing order.
+    """
+    if factors is None:
+        factors = factorization(n)
+    divisors = [1]
+    for prime, exponent in factors.items():
+        powers = [prime ** e for e in range(1, exponent + 1)]
+        divisors += [d * power for power in powers for d in divisors]
+    divisors.sort()
+    return divisors
 
 
-def decimate(num, denom):
+def divisors(num, low=1, high=None, factors=None):
+    """
+    Generate the divisors of a positive integer in increasing order, without
+    finding them all first.  With `low` and `high`, only the divisors
+    between them (inclusive) are generated, and anything larger than `high`
+    isn't even looked at.
+    """
+    if factors is None:
+        factors = factorization(num)
+    primes = list(factors)
+    if high is None:
+        high = num
+    # Each divisor is reached from a smaller one by multiplying by a prime no
+    # smaller than any it already has, so each is reached exactly once, and
+    # the heap always holds the smallest divisor not yet generated
+    heap = [(1, 0)]
+    while heap:
+        divisor, first = heapq.heappop(heap)
+        if divisor >= low:
+            yield divisor
+        for i in range(first, len(primes)):
+            multiple = divisor * primes[i]
+            if multiple <= high and not num % multiple:
+                heapq.heappush(heap, (multiple, i))
+
+
+def divisor_count(num, factors=None):
+    """
+    Return the number of divisors of a positive integer, without listing
+    them.
+    """
+    if factors is None:
+        factors = factorization(num)
+    return prod(e + 1 for e in factors.values())
+
+
+def divisor_sum(num, power=1, factors=None):
+    """
+    Return the sum of the divisors of a positive integer (or, with `power`,
+    of their powers: the sum of their squares, say), without listing them.
+    """
+    if factors is None:
+        factors = factorization(num)
+    if power == 0:
+        return divisor_count(num, factors)
+    return prod((p ** (power * (e + 1)) - 1) // (p ** power - 1)
+                for p, e in factors.items())
+
+
+def multiplicative_order(base, modulus):
+    """
+    Return the smallest k > 0 such that base ** k == 1 (mod modulus), which
+    exists only if base and modulus are coprime.
+    """
+    if modulus < 1 or gcd(base, modulus) != 1:
+        raise ValueError(f'No order of {base} modulo {modulus}')
+    if modulus == 1:
+        return 1
+    # The order divides the Carmichael function of the modulus, so start
+    # there and divide out whatever primes can be
+    order = 1
+    for prime, exponent in factorization(modulus).items():
+        if prime == 2 and exponent >= 3:
+            cycle = 2 ** (exponent - 2)
+        else:
+            cycle = prime ** (exponent - 1) * (prime - 1)
+        order = lcm(order, cycle)
+    for prime in factorization(order):
+        while not order % prime and pow(base, order // prime, modulus) == 1:
+            order //= prime
+    return order
+
+
+def decimate(num, denom, base=10):
+    """
+    Given a fraction, return its expansion as [digits that don't repeat,
+    digits that do], in base 10 or another `base` (between 2 and 36, as for
+    binarize()).  The first "digit" includes the whole part: decimate(15, 8)
+    is [[18, 7, 5], []] for 1.875.
+    """
+    _check_base(base)
     expansion = []
-    numseen = []
-    while num not in numseen and num != 0:
-        numseen.append(num)
-        num *= 10
-        exp, num = divmod(num, denom)
-        expansion.append(exp)
-    if num == 0:
-        result = [expansion, []]
-    else:
-        break_point = numseen.index(num)
-        result = [expansion[:break_point], expansion[break_point:]]
-    return result
+    # Where each remainder was seen; when one comes around again, the digits
+    # from then on repeat
+    seen = {}
+    while num and num not in seen:
+        seen[num] = len(expansion)
+        digit, num = divmod(num * base, denom)
+        expansion.append(digit)
+    if not num:
+        return [expansion, []]
+    break_point = seen[num]
+    return [expansion[:break_point], expansion[break_point:]]
+
+
+def fraction_period(num, denom, base=10):
+    """
+    Return the lengths of the two lists decimate() would return, without
+    expanding the fraction (which, for a denominator near a million, can mean
+    a million digits): the non-repeating part comes from the factors the
+    denominator shares with the base, and the period is the multiplicative
+    order of the base modulo what's left.
+    """
+    _check_base(base)
+    if denom < 1:
+        raise ValueError(f'Denominator must be positive: {denom}')
+    if not num:
+        return 0, 0
+    remaining = denom // gcd(num, denom)
+    prefix = 0
+    for prime, exponent in factorization(base).items():
+        count = 0
+        while not remaining % prime:
+            remaining //= prime
+            count += 1
+        prefix = max(prefix, -(-count // exponent))
+    if not 0 <= num < denom:
+        # The first remainder is num itself, which never comes up again
+        prefix = max(prefix, 1)
+    if remaining == 1:
+        return prefix, 0
+    return prefix, multiplicative_order(base, remaining)
+
+
+def fraction_digits(num, denom, base=10):
+    """
+    Generate the digits of a fraction's expansion (as decimate() would list
+    them) one at a time, forever if it repeats.
+    """
+    _check_base(base)
+    while num:
+        digit, num = divmod(num * base, denom)
+        yield digit
@@ -5,6 +5,14 @@ Representing letters as primes and words as their product is not original to
 me, but I stol...er, "borrowed" the idea so long ago that I can't for the life
 of me remember whose it was.
 """
+import itertools
+import mmap
+import multiprocessing
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
 # Letters ordered by frequency, mapped to the first 26 primes
 LETTERS_TO_PRIMES = {
     'E': 2,  'T': 3,  'A': 5,  'O': 7,  'I': 11, 'N': 13, 'S': 17, 'R': 19,
@@ -14,6 +22,22 @@ LETTERS_TO_PRIMES = {
 }
 PRIMES_TO_LETTERS = {y: x for x, y in LETTERS_TO_PRIMES.items()}
 
+# The same letters, each given a four-bit field in a packed count; see
+# letters_to_counts() below
+LETTERS_TO_COUNTS = {
+    letter: 1 << (4 * i) for i, letter in enumerate(LETTERS_TO_PRIMES)
+}
+_COUNT_MAX = 7
+_COUNT_GUARDS = sum(unit << 3 for unit in LETTERS_TO_COUNTS.values())
+
+# Compiled Anadict files are a header (a magic string, which also says which
+# scheme the keys use, and the number of entries), two tables of offsets into
+# the file (native-endian unsigned 64-bit integers, one more than there are
+# entries), the keys (as signed big-endian bytes, in increasing order), and the
+# entries for each key (as newline-separated UTF-8).
+_MAGICS = {'primes': b'ANADICTP', 'counts': b'ANADICTC'}
+_HEADER = struct.Struct('=8sQ')
+
 
 def letters_to_primes(word):
     """
@@ -41,24 +65,541 @@ def primes_to_letters(number):
     return result
 
 
-class Anadict(dict):
+def letters_to_counts(word):
+    """
+    Given a word, convert it to a packed count of its letters: an integer with
+    four bits per letter, which fits in 128 bits no matter how long the word
+    is, unlike the product of primes.
+
+    The top bit of each field is kept clear (see counts_difference()), so this
+    can only count up to seven of any letter.  Past that, it falls back on the
+    (negated) product of primes, which the other count functions understand.
+    """
+    result = 0
+    letters = 0
+    for letter in word.upper():
+        if letter in LETTERS_TO_COUNTS:
+            result += LETTERS_TO_COUNTS[letter]
+            letters += 1
+    # A field that overflowed sets its guard bit, unless it got as far as
+    # carrying into the next field; either way, it loses letters, so the
+    # fields only add up if none did
+    if letters > _COUNT_MAX and (
+            result & _COUNT_GUARDS
+            or (letters > 2 * _COUNT_MAX
+                and len(_count_fields(result)) != letters)):
+        return -letters_to_primes(word)
+    return result
+
+
+def counts_to_letters(number):
+    """
+    Given a packed count, convert it to a letter string, in the same order as
+    primes_to_letters().
+    """
+    if number < 0:
+        return primes_to_letters(-number)
+    return _count_fields(number)
+
+
+def _count_fields(number):
+    # Read each field of a packed count, ignoring guard bits
+    return ''.join(letter * ((number >> (4 * i)) & _COUNT_MAX)
+                   for i, letter in enumerate(LETTERS_TO_COUNTS))
+
+
+def counts_difference(big, small):
+    """
+    Given two packed counts, return the count of the letters in `big` that
+    aren't in `small` if `small` is a subanagram of `big`, or None if not.
+    (This is the packed-count version of `divmod(big, small)`.)
+    """
+    if big >= 0 and small >= 0:
+        # Setting the guard bit in every field of `big` lets all 26 fields be
+        # subtracted at once: a field that would go negative borrows its
+        # guard bit, and nothing else.
+        difference = (big | _COUNT_GUARDS) - small
+        if difference & _COUNT_GUARDS != _COUNT_GUARDS:
+            return None
+        return difference ^ _COUNT_GUARDS
+    quotient, remainder = divmod(letters_to_primes(counts_to_letters(big)),
+                                 letters_to_primes(counts_to_letters(small)))
+    if remainder:
+        return None
+    return letters_to_counts(primes_to_letters(quotient))
+
+
+def letters_to_primes_many(words, processes=None, chunksize=50000):
+    """
+    Given an iterable of words, return a list of their numbers (as from
+    letters_to_primes()).  With `processes`, the work is split into chunks of
+    `chunksize` words and farmed out to that many worker processes, which is
+    worthwhile for wordlists in the millions.
+    """
+    return _keys_many(_primes_chunk, words, processes, chunksize)
+
+
+def letters_to_counts_many(words, processes=None, chunksize=50000):
+    """
+    Given an iterable of words, return a list of their packed counts (as from
+    letters_to_counts()), optionally using `processes` worker processes.
+    """
+    return _keys_many(_counts_chunk, words, processes, chunksize)
+
+
+def _keys_many(chunk_function, words, processes, chunksize):
+    if not processes:
+        return chunk_function(words)
+    words = list(words)
+    chunks = [words[i:i + chunksize] for i in range(0, len(words), chunksize)]
+    with multiprocessing.Pool(processes) as pool:
+        return list(itertools.chain.from_iterable(
+            pool.imap(chunk_function, chunks)
+        ))
+
+
+def _primes_chunk(words):
+    # The body of letters_to_primes(), inlined, with the lookups bound to
+    # locals, which is a good deal faster than calling it once per word
+    get = LETTERS_TO_PRIMES.get
+    keys = []
+    for word in words:
+        key = 1
+        for letter in word.upper():
+            key *= get(letter, 1)
+        keys.append(key)
+    return keys
+
+
+def _counts_chunk(words):
+    return [letters_to_counts(word) for word in words]
+
+
+def _primes_difference(big, small):
+    # counts_difference(), for products of primes
+    quotient, remainder = divmod(big, small)
+    return None if remainder else quotient
+
+
+# The key schemes an Anadict can use: for each, the functions from a string to
+# a key and back, from many strings to their keys, and from two keys to the
+# key of the letters left when the second is taken out of the first.
+SCHEMES = {
+    'primes': (letters_to_primes, primes_to_letters, letters_to_primes_many,
+               _primes_difference),
+    'counts': (letters_to_counts, counts_to_letters, letters_to_counts_many,
+               counts_difference),
+}
+
+
+def _get_scheme(scheme):
+    if scheme not in SCHEMES:
+        raise ValueError(f'Unknown scheme: {scheme}')
+    return SCHEMES[scheme]
+
+
+class _SubanagramIndex:
+    """
+    Subanagram lookup for the Anadict classes, which are expected to be
+    mappings from numbers to sets of strings, with a `scheme`.
+    """
+    def _build_index(self):
+        # The index is a trie of each key's letters, in the (fixed) order that
+        # primes_to_letters() produces them, with the key itself stored at the
+        # node where its letters run out.  Because every path is in the same
+        # order, a search only ever has to consider the letters still left in
+        # the rack, and a whole branch is dropped as soon as a letter is
+        # missing, rather than testing every product in the dictionary.
+        to_letters = _get_scheme(self.scheme)[1]
+        index = {}
+        for key in self:
+            node = index
+            for letter in to_letters(key):
+                node = node.setdefault(letter, {})
+            node.setdefault(None, []).append(key)
+        self._index = index
+        return index
+
+    def subanagram_keys(self, letters):
+        """
+        Given a string (or its key), return a list of the keys in this
+        Anadict that are subanagrams of it (e.g., for prime products, that
+        divide its number).
+        """
+        if not isinstance(letters, str):
+            letters = _get_scheme(self.scheme)[1](letters)
+        index = getattr(self, '_index', None) or self._build_index()
+        rack = {}
+        for letter in letters.upper():
+            if letter in LETTERS_TO_PRIMES:
+                rack[letter] = rack.get(letter, 0) + 1
+
+        keys = []
+
+        def search(node):
+            for letter, child in node.items():
+                if letter is None:
+                    keys.extend(child)
+                elif rack.get(letter):
+                    rack[letter] -= 1
+                    search(child)
+                    rack[letter] += 1
+
+        search(index)
+        return keys
+
+    def subanagrams(self, letters):
+        """
+        Given a string (or its number), return the set of entries in this
+        Anadict that can be spelled using only its letters.
+
+        The index this uses is built the first time it's needed, so changes
+        to the Anadict after that won't be seen by this method until
+        `reindex()` is called.
+        """
+        result = set()
+        for key in self.subanagram_keys(letters):
+            result |= self[key]
+        return result
+
+    def reindex(self):
+        """
+        Rebuild the subanagram index (after the Anadict has been changed).
+        """
+        self._build_index()
+
+
+class Anadict(_SubanagramIndex, dict):
     """
     Dictionary that allows lookup by integer or string.
+
+    Keys are products of primes by default; the `scheme` attribute says which
+    of the SCHEMES is in use.
     """
+    scheme = 'primes'
+
     @classmethod
-    def from_path(cls, path):
+    def from_path(cls, path, scheme='primes', processes=None):
         """
         Given a path, return an Anadict of lines from that path (i.e. one that
         maps numbers to the lines in the file that correspond to that number).
+        `scheme` is the kind of number to use (see SCHEMES); `processes` is
+        passed on to computing the numbers (see letters_to_primes_many()).
         """
-        anadict = {}
         with open(path) as f:
-            for line in f:
-                line = line.strip().upper()
-                anadict.setdefault(letters_to_primes(line), set()).add(line)
-        return cls(anadict)
+            lines = [line.strip() for line in f.read().upper().splitlines()]
+        keys = _get_scheme(scheme)[2](lines, processes=processes)
+        anadict = {}
+        for key, line in zip(keys, lines):
+            if key in anadict:
+                anadict[key].add(line)
+            else:
+                anadict[key] = {line}
+        anadict = cls(anadict)
+        anadict.scheme = scheme
+        return anadict
 
     def __getitem__(self, item):
         if isinstance(item, str):
-            item = letters_to_primes(item)
+            item = _get_scheme(self.scheme)[0](item)
         return super().__getitem__(item)
+
+    def save(self, path):
+        """
+        Write this Anadict to `path` in the compiled format that MappedAnadict
+        reads.
+        """
+        keys = sorted(self)
+        key_blobs = [key.to_bytes(key.bit_length() // 8 + 1, 'big', signed=True)
+                     for key in keys]
+        word_blobs = ['\n'.join(sorted(self[key])).encode() for key in keys]
+
+        key_offsets = array('Q', [_HEADER.size + 16 * (len(keys) + 1)])
+        for blob in key_blobs:
+            key_offsets.append(key_offsets[-1] + len(blob))
+        word_offsets = array('Q', [key_offsets[-1]])
+        for blob in word_blobs:
+            word_offsets.append(word_offsets[-1] + len(blob))
+
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGICS[self.scheme], len(keys)))
+            key_offsets.tofile(f)
+            word_offsets.tofile(f)
+            f.writelines(key_blobs)
+            f.writelines(word_blobs)
+
+
+class MappedAnadict(_SubanagramIndex, Mapping):
+    """
+    A read-only Anadict that reads its entries directly out of a compiled file
+    (see `Anadict.save()` and `compile_wordlist()`), via mmap.  Opening one is
+    nearly instantaneous no matter how big the file is, and processes that
+    open the same file share its pages.
+
+    The subanagram index (see `subanagrams()`) isn't stored in the file,
+    though: the first subanagram query reads every key out of it and builds
+    the index in memory, in each process, which takes a second or two for a
+    wordlist of a few hundred thousand words.  Lookups by key don't need it.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        schemes = {y: x for x, y in _MAGICS.items()}
+        try:
+            magic, self._count = _HEADER.unpack_from(self._mmap)
+        except struct.error:
+            magic = None
+        start = _HEADER.size
+        if magic in schemes:
+            middle = start + 8 * (self._count + 1)
+            end = 2 * middle - start
+        # The file has to be long enough for both offset tables, and exactly
+        # as long as the last offset says (so a truncated file is caught)
+        if (magic not in schemes or len(self._mmap) < end
+                or struct.unpack_from('=Q', self._mmap, end - 8)[0]
+                != len(self._mmap)):
+            self._mmap.close()
+            raise ValueError(f'Not a compiled Anadict: {path}')
+        self.scheme = schemes[magic]
+        # Both offset tables are read in place, without copying
+        self._view = memoryview(self._mmap)
+        self._key_offsets = self._view[start:middle].cast('Q')
+        self._word_offsets = self._view[middle:end].cast('Q')
+
+    def _key_at(self, i):
+        return int.from_bytes(
+            self._mmap[self._key_offsets[i]:self._key_offsets[i + 1]], 'big',
+            signed=True
+        )
+
+    def __getitem__(self, item):
+        if isinstance(item, str):
+            item = _get_scheme(self.scheme)[0](item)
+        # Keys are stored in increasing order, so this is a binary search
+        i = bisect_left(range(self._count), item, key=self._key_at)
+        if i == self._count or self._key_at(i) != item:
+            raise KeyError(item)
+        words = self._mmap[self._word_offsets[i]:self._word_offsets[i + 1]]
+        return set(words.decode().split('\n'))
+
+    def __iter__(self):
+        return (self._key_at(i) for i in range(self._count))
+
+    def __len__(self):
+        return self._count
+
+    def __reduce__(self):
+        # An open mmap can't be pickled, but the file can just be reopened
+        # (e.g. when handing one of these to a worker process)
+        return type(self), (self.path,)
+
+    def close(self):
+        self._key_offsets.release()
+        self._word_offsets.release()
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def compile_wordlist(source, destination, scheme='primes', processes=None):
+    """
+    Given the path to a wordlist, write it to `destination` as a compiled
+    Anadict that can be opened with MappedAnadict.
+    """
+    Anadict.from_path(source, scheme=scheme, processes=processes).save(
+        destination
+    )
+
+
+def phrase_anagrams(phrase, anadict, max_words=None, min_length=1,
+                    required=(), forbidden=()):
+    """
+    Given a phrase and an Anadict, generate every multi-word anagram of the
+    phrase (as a tuple of entries) that can be made from the Anadict.
+
+    `max_words` limits the number of words in each anagram, and `min_length`
+    is the shortest word that will be used.  Words in `required` will be in
+    every result (first, in the order given); words in `forbidden` won't be
+    in any.  Entries within a result are otherwise in increasing order of
+    their numbers, so no anagram is generated in more than one order.
+    """
+    to_key, to_letters, _, difference = _get_scheme(anadict.scheme)
+    # The key of no letters at all: 1 for primes, 0 for counts
+    empty = to_key('')
+    remainder = to_key(phrase)
+    for word in required:
+        remainder = difference(remainder, to_key(word))
+        if remainder is None:
+            return
+    required = tuple(word.upper() for word in required)
+    if max_words is not None:
+        max_words -= len(required)
+        if max_words < 0:
+            return
+    forbidden = {word.upper() for word in forbidden}
+
+    words_by_key = {}
+    for key in anadict.subanagram_keys(remainder):
+        if len(to_letters(key)) < max(min_length, 1):
+            continue
+        words = anadict[key] - forbidden
+        if words:
+            words_by_key[key] = sorted(words)
+
+    # The same remainder turns up over and over (after "TEA" + "NO" and after
+    # "EAT" + "ON", say), so both the usable keys that fit in it and the ways
+    # of finishing it are computed once and reused.  Results are tuples of
+    # keys, never decreasing, so that no anagram is found in two orders.
+    fitting = {}
+    memo = {}
+
+    def candidates(remainder, smallest):
+        if remainder not in fitting:
+            fitting[remainder] = sorted(
+                key for key in anadict.subanagram_keys(remainder)
+                if key in words_by_key
+            )
+        for key in fitting[remainder]:
+            if key < smallest:
+                continue
+            rest = difference(remainder, key)
+            # Anything left over has to be made of keys at least this big,
+            # which add up (or multiply) to at least this much, unless some
+            # of them are negative (counts that fell back on primes)
+            if rest == empty or rest >= key or rest < 0 or key < 0:
+                yield key, rest
+
+    def search(remainder, smallest, words_left):
+        if remainder == empty:
+            return [()]
+        if words_left == 0:
+            return []
+        if words_left == 1:
+            # No need to search when the remainder has to be a single word
+            if remainder >= smallest and remainder in words_by_key:
+                return [(remainder,)]
+            return []
+        memo_key = (remainder, smallest, words_left)
+        if memo_key not in memo:
+            memo[memo_key] = [
+                (key,) + rest
+                for key, quotient in candidates(remainder, smallest)
+                for rest in search(quotient, key, _decrement(words_left))
+            ]
+        return memo[memo_key]
+
+    if remainder == empty:
+        if required:
+            yield required
+        return
+    if max_words == 0 or not words_by_key:
+        return
+
+    # The top level isn't memoized, so results start arriving right away
+    for key, quotient in candidates(remainder, min(words_by_key)):
+        for rest in search(quotient, key, _decrement(max_words)):
+            # A key used more than once mustn't have its words in every
+            # order (TO OT and OT TO), so each run of the same key gets its
+            # words in increasing order only
+            runs = [
+                itertools.combinations_with_replacement(words_by_key[k],
+                                                        len(list(group)))
+                for k, group in itertools.groupby((key,) + rest)
+            ]
+            for words in itertools.product(*runs):
+                yield required + sum(words, ())
+
+
+def _decrement(words_left):
+    # Small helper for phrase_anagrams(), where None means "no limit"
+    return None if words_left is None else words_left - 1
+
+
+class PatternIndex:
+    """
+    An index of a wordlist for crossword-style patterns, like "?A?E?", where
+    "?" (or ".") can be any letter and anything else has to match exactly.
+
+    For each length of word, and each position within it, this keeps a bitset
+    (as an integer) of which words have each letter at that position, so a
+    match is just the intersection of one bitset per known letter.
+    """
+    WILDCARDS = '?.'
+
+    def __init__(self, words):
+        self._words = {}
+        for word in words:
+            word = word.upper()
+            self._words.setdefault(len(word), []).append(word)
+
+        self._bitsets = {}
+        for length, words in self._words.items():
+            postings = [{} for _ in range(length)]
+            for i, word in enumerate(words):
+                for position, letter in enumerate(word):
+                    postings[position].setdefault(letter, []).append(i)
+            self._bitsets[length] = [
+                {letter: _to_bitset(indices, len(words))
+                 for letter, indices in posting.items()}
+                for posting in postings
+            ]
+
+    @classmethod
+    def from_path(cls, path):
+        """
+        Given a path, return a PatternIndex of the lines in that file.
+        """
+        with open(path) as f:
+            return cls(line.strip() for line in f)
+
+    def match(self, pattern, letters=None):
+        """
+        Given a pattern, return a list of the words (in their original order)
+        that match it.
+
+        If `letters` is given, the wildcards have to be filled using only those
+        letters (as if from a Scrabble rack, say).
+        """
+        pattern = pattern.upper()
+        if len(pattern) not in self._words:
+            return []
+        words = self._words[len(pattern)]
+        bitsets = self._bitsets[len(pattern)]
+        bitset = (1 << len(words)) - 1
+        for position, letter in enumerate(pattern):
+            if letter not in self.WILDCARDS:
+                bitset &= bitsets[position].get(letter, 0)
+                if not bitset:
+                    return []
+
+        # Reading the bits off a string is much faster than picking them off
+        # one at a time with integer arithmetic
+        bits = format(bitset, 'b')[::-1]
+        result = []
+        i = bits.find('1')
+        while i != -1:
+            result.append(words[i])
+            i = bits.find('1', i + 1)
+
+        if letters is not None:
+            # The fixed letters are free, so the bank effectively has them too
+            known = ''.join(x for x in pattern if x not in self.WILDCARDS)
+            bank = letters_to_primes(letters) * letters_to_primes(known)
+            result = [word for word in result
+                      if not bank % letters_to_primes(word)]
+        return result
+
+
+def _to_bitset(indices, size):
+    # Build an integer with the given bits set.  Setting bits one at a time on
+    # an integer is quadratic, so this goes through a bytearray instead.
+    buffer = bytearray((size + 7) // 8)
+    for i in indices:
+        buffer[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buffer, 'little')
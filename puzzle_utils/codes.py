@@ -5,10 +5,195 @@ Enciphering classes.
 
 The main entry for each class is the `encode()` and `decode()` pair.
 """
+import itertools
+import math
+import multiprocessing
+import random
+import re
+import time
+from collections import Counter, defaultdict
 from string import ascii_uppercase, ascii_lowercase
 
 from puzzle_utils import bunch, alphafy
 from puzzle_utils import data
+from puzzle_utils import ngrams
+from puzzle_utils.fitness import english_bigram_frequencies
+
+# Log probabilities of English letters and bigrams, for scoring candidate
+# plaintexts
+_LOG_LETTERS = [math.log(data.LETTER_FREQUENCY[x]) for x in ascii_uppercase]
+_BIGRAMS = english_bigram_frequencies()
+_LOG_BIGRAMS = [[math.log(_BIGRAMS[a + b]) for b in ascii_uppercase]
+                for a in ascii_uppercase]
+
+
+def _rank(text, candidates):
+    """
+    Given a text and a dictionary mapping keys to substitutions (each a list
+    saying which plaintext letter, as 0-25, each ciphertext letter becomes),
+    return a list of (score, key) pairs, best first.  The score is the log
+    likelihood of the plaintext's letters and bigrams in English.
+    """
+    # The text is only counted once; each candidate just rearranges the counts
+    letters = alphafy(text).upper()
+    letter_counts = Counter(letters)
+    counts = [letter_counts[x] for x in ascii_uppercase]
+    bigram_counts = [
+        (ord(a) - 65, ord(b) - 65, n)
+        for (a, b), n in Counter(zip(letters, letters[1:])).items()
+        if a in ascii_uppercase and b in ascii_uppercase
+    ]
+    ranked = []
+    for key, plain in candidates.items():
+        score = sum(n * _LOG_LETTERS[plain[c]] for c, n in enumerate(counts))
+        score += sum(n * _LOG_BIGRAMS[plain[a]][plain[b]]
+                     for a, b, n in bigram_counts)
+        ranked.append((score, key))
+    ranked.sort(reverse=True)
+    return ranked
+
+
+# The log likelihood of the letters of a unit of plaintext (one letter or
+# two, as 0-25) and of the bigram inside it, if any
+_UNIT_SCORES = {(a,): _LOG_LETTERS[a] for a in range(26)}
+_UNIT_SCORES.update({
+    (a, b): _LOG_LETTERS[a] + _LOG_LETTERS[b] + _LOG_BIGRAMS[a][b]
+    for a in range(26) for b in range(26)
+})
+
+
+class _Search:
+    """
+    The ciphertext half of a hill-climbing search for a key.  The ciphertext
+    is a sequence of units (letters, or digraphs for Playfair) that each
+    decrypt to a tuple of plaintext letters (as 0-25), depending on the key;
+    a key is scored by the log likelihood of the plaintext's letters and
+    bigrams, like _rank().
+
+    Each unit is only scored once however often it appears, and after a
+    change to the key, only the units that might have changed (and the
+    bigrams that join them to their neighbors) are decrypted and rescored.
+
+    Subclasses define:
+        random_key(rng): a new random key
+        mutate(key, rng): a new key close to `key`, and the units whose
+            plaintext that might change (or None, for all of them)
+        decrypt(key, units): a dict from each of `units` (or every unit, if
+            None) to its plaintext under `key`
+    """
+    def __init__(self, units):
+        self.counts = Counter(units)
+        # The bigrams that span two units, also listed under each unit they
+        # touch
+        self.joins = Counter(zip(units, units[1:]))
+        self.joins_by_unit = defaultdict(list)
+        for (u, v), n in self.joins.items():
+            self.joins_by_unit[u].append((u, v, n))
+            if v != u:
+                self.joins_by_unit[v].append((u, v, n))
+
+    def score(self, plain):
+        score = sum(n * _UNIT_SCORES[plain[u]]
+                    for u, n in self.counts.items())
+        score += sum(n * _LOG_BIGRAMS[plain[u][-1]][plain[v][0]]
+                     for (u, v), n in self.joins.items())
+        return score
+
+    def rescore(self, plain, changes):
+        """
+        Return the change in score if the plaintexts of some units change
+        from those in `plain` to those in `changes` (a dict of just the
+        units that changed).
+        """
+        delta = 0
+        for u, new in changes.items():
+            delta += self.counts[u] * (_UNIT_SCORES[new] -
+                                       _UNIT_SCORES[plain[u]])
+            for a, b, n in self.joins_by_unit[u]:
+                # A join between two changed units is counted from the first
+                if a == u or a not in changes:
+                    delta += n * (
+                        _LOG_BIGRAMS[changes.get(a, plain[a])[-1]]
+                                    [changes.get(b, plain[b])[0]] -
+                        _LOG_BIGRAMS[plain[a][-1]][plain[b][0]]
+                    )
+        return delta
+
+
+def _anneal(search, iterations, seconds, seed):
+    """
+    Run one simulated-annealing search for `iterations` steps (or until
+    `seconds` have passed, if given), returning the best (score, key) seen.
+    The temperature falls linearly to zero over the run, so the end of it is
+    a plain hill climb.
+    """
+    rng = random.Random(seed)
+    key = search.random_key(rng)
+    plain = search.decrypt(key, None)
+    score = search.score(plain)
+    best = (score, key)
+    # Scores are sums over the whole text, so the temperature scales with it
+    start_temperature = .05 * sum(search.counts.values())
+    start_time = time.monotonic()
+    progress = 0
+    for i in range(iterations):
+        if seconds and not i % 256:
+            progress = (time.monotonic() - start_time) / seconds
+            if progress >= 1:
+                break
+        temperature = start_temperature * (1 - max(i / iterations, progress))
+        candidate, units = search.mutate(key, rng)
+        changes = search.decrypt(candidate, units)
+        changes = {u: new for u, new in changes.items() if new != plain[u]}
+        delta = search.rescore(plain, changes)
+        if delta >= 0 or (temperature > 0 and
+                          rng.random() < math.exp(delta / temperature)):
+            key, score = candidate, score + delta
+            plain.update(changes)
+            if score > best[0]:
+                best = (score, key)
+    return best
+
+
+def _anneal_worker(args):
+    return _anneal(*args)
+
+
+def _crack_by_annealing(search, restarts, iterations, seconds, processes,
+                        seed):
+    """
+    Run `restarts` independent annealing searches, in `processes` worker
+    processes if given, and return their (score, key) results, best first.
+    """
+    jobs = [(search, iterations, seconds,
+             None if seed is None else f'{seed}/{restart}')
+            for restart in range(restarts)]
+    if processes:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(_anneal_worker, jobs)
+    else:
+        results = [_anneal_worker(job) for job in jobs]
+    results.sort(reverse=True)
+    return results
+
+
+class _SubstitutionSearch(_Search):
+    # A key is a list saying which plaintext letter each ciphertext letter
+    # becomes
+    def random_key(self, rng):
+        key = list(range(26))
+        rng.shuffle(key)
+        return key
+
+    def mutate(self, key, rng):
+        key = key[:]
+        a, b = rng.sample(range(26), 2)
+        key[a], key[b] = key[b], key[a]
+        return key, (a, b)
+
+    def decrypt(self, key, units):
+        return {u: (key[u],) for u in (self.counts if units is None else units)
+                if u in self.counts}
 
 
 class Atbash:
@@ -50,6 +235,214 @@ class Caesar:
     def show_all(self, text):
         return [text.translate(self.translations[i]) for i in range(26)]
 
+    def crack(self, text):
+        """
+        Try every shift of a text, and return a list of (score, distance,
+        plaintext) tuples, most English-like first, where `distance` is the
+        argument to decode() that gives `plaintext`.
+        """
+        candidates = {distance: [(c - distance) % 26 for c in range(26)]
+                      for distance in range(26)}
+        return [(score, distance, self.decode(text, distance))
+                for score, distance in _rank(text, candidates)]
+
+
+class Affine:
+    """
+    The affine cipher maps each letter x (as 0-25) to a * x + b (mod 26), with
+    a coprime to 26.  (Caesar shifts are affine ciphers with a = 1, and the
+    Atbash is the one with a = b = 25.)
+    """
+    @staticmethod
+    def _translation(a, b, direction):
+        if math.gcd(a, 26) != 1:
+            raise ValueError(f'Not coprime with 26: {a}')
+        cipher = ''.join(ascii_uppercase[(a * x + b) % 26] for x in range(26))
+        if direction < 0:
+            return str.maketrans(cipher + cipher.lower(),
+                                 ascii_uppercase + ascii_lowercase)
+        return str.maketrans(ascii_uppercase + ascii_lowercase,
+                             cipher + cipher.lower())
+
+    def encode(self, text, a, b):
+        return text.translate(self._translation(a, b, 1))
+
+    def decode(self, text, a, b):
+        return text.translate(self._translation(a, b, -1))
+
+    def crack(self, text):
+        """
+        Try every key for a text, and return a list of (score, (a, b),
+        plaintext) tuples, most English-like first.
+        """
+        candidates = {}
+        for a in range(1, 26, 2):
+            if a == 13:
+                continue
+            inverse = pow(a, -1, 26)
+            for b in range(26):
+                candidates[(a, b)] = [inverse * (c - b) % 26
+                                      for c in range(26)]
+        return [(score, key, self.decode(text, *key))
+                for score, key in _rank(text, candidates)]
+
+
+class Substitution:
+    """
+    A general monoalphabetic substitution cipher.  The key is the cipher
+    alphabet: a 26-letter string giving what A, B, ..., Z each become.
+    """
+    @staticmethod
+    def _translation(key, direction):
+        key = key.upper()
+        if sorted(key) != list(ascii_uppercase):
+            raise ValueError(f'Not a permutation of the alphabet: {key}')
+        if direction < 0:
+            return str.maketrans(key + key.lower(),
+                                 ascii_uppercase + ascii_lowercase)
+        return str.maketrans(ascii_uppercase + ascii_lowercase,
+                             key + key.lower())
+
+    def encode(self, text, key):
+        return text.translate(self._translation(key, 1))
+
+    def decode(self, text, key):
+        return text.translate(self._translation(key, -1))
+
+    def crack(self, text, restarts=4, iterations=20000, seconds=None,
+              processes=None, seed=None):
+        """
+        Search for the key to a substitution cipher by simulated annealing,
+        and return a list of (score, key, plaintext) tuples, most
+        English-like first, one for each of `restarts` independent searches.
+
+        Each search runs for `iterations` steps or `seconds` seconds,
+        whichever is shorter; with `processes`, the searches are run in that
+        many worker processes.  `seed` makes the results reproducible.
+        Anything much shorter than a few hundred letters won't have enough
+        statistics to go on.
+        """
+        units = list(ngrams.to_codes(text))
+        if not units:
+            return []
+        results = []
+        for score, plain in _crack_by_annealing(
+                _SubstitutionSearch(units), restarts, iterations, seconds,
+                processes, seed):
+            key = [''] * 26
+            for c, x in enumerate(plain):
+                key[x] = ascii_uppercase[c]
+            key = ''.join(key)
+            results.append((score, key, self.decode(text, key)))
+        return results
+
+
+class Vigenere:
+    """
+    The Vigenère cipher shifts each letter by the corresponding letter of a
+    repeating keyword (A = 0, B = 1, ...).  Non-letters are passed through,
+    and don't use up a letter of the keyword.
+    """
+    # Byte translation tables shifting letters (either case) forward by n
+    _SHIFTS = [
+        bytes.maketrans(
+            (ascii_uppercase + ascii_lowercase).encode(),
+            (ascii_uppercase[n:] + ascii_uppercase[:n] +
+             ascii_lowercase[n:] + ascii_lowercase[:n]).encode()
+        )
+        for n in range(26)
+    ]
+    _LETTER_RUNS = re.compile('([A-Za-z]+)')
+
+    def __init__(self, keyword):
+        self.keyword = ''.join(x for x in keyword.upper()
+                               if x in ascii_uppercase)
+        if not self.keyword:
+            raise ValueError(f'Keyword has no letters: {keyword}')
+        self._shifts = [ord(x) - 65 for x in self.keyword]
+
+    def _translate(self, text, direction):
+        # The letters of the text are pulled out as bytes, so that every
+        # letter that uses the same letter of the keyword can be translated at
+        # once (as an extended slice), and then put back where they came from
+        pieces = self._LETTER_RUNS.split(text)
+        letters = bytearray(''.join(pieces[1::2]).encode())
+        period = len(self._shifts)
+        for i, shift in enumerate(self._shifts):
+            table = self._SHIFTS[direction * shift % 26]
+            letters[i::period] = letters[i::period].translate(table)
+        letters = letters.decode()
+
+        start = 0
+        for i in range(1, len(pieces), 2):
+            end = start + len(pieces[i])
+            pieces[i] = letters[start:end]
+            start = end
+        return ''.join(pieces)
+
+    def encode(self, text):
+        return self._translate(text, 1)
+
+    def decode(self, text):
+        return self._translate(text, -1)
+
+    @classmethod
+    def crack(cls, text, max_length=20, lengths=3):
+        """
+        Try to break a Vigenère ciphertext without the keyword.  Returns a
+        list of (score, keyword, plaintext) tuples, most English-like first.
+
+        The most likely keyword lengths (up to `max_length`; the best
+        `lengths` of them are tried) are found by the index of coincidence:
+        when the text is split into columns by the right length, each column
+        is a Caesar shift of English and its letters repeat as often as
+        English letters do.  Each column's shift is then the one whose letter
+        frequencies best match English.
+        """
+        # As bytes 0-25, so that columns can be sliced out and counted in C
+        codes = ngrams.to_codes(text)
+        if not codes:
+            return []
+
+        coincidences = []
+        for length in range(1, min(max_length, len(codes)) + 1):
+            total = 0
+            for i in range(length):
+                column = codes[i::length]
+                pairs = len(column) * (len(column) - 1)
+                if pairs:
+                    total += sum(n * (n - 1) for n in
+                                 Counter(column).values()) / pairs
+            coincidences.append((total / length, length))
+
+        # Lengths whose columns look more like the best length's than like
+        # random letters, shortest first.  Multiples of the right length do as
+        # well as it does (short columns even do better, by chance), so
+        # they're skipped; a length that shares only some of the keyword's
+        # letters falls short of the threshold.
+        threshold = (max(coincidences)[0] + 1 / 26) / 2
+        candidates = []
+        for ioc, length in coincidences:
+            if ioc >= threshold and all(length % shorter
+                                        for shorter in candidates):
+                candidates.append(length)
+        candidates = candidates[:lengths]
+
+        results = []
+        for length in candidates:
+            keyword = ''
+            for i in range(length):
+                counts = Counter(codes[i::length])
+                shift = max(range(26), key=lambda d: sum(
+                    n * _LOG_LETTERS[(c - d) % 26] for c, n in counts.items()
+                ))
+                keyword += ascii_uppercase[shift]
+            plaintext = cls(keyword).decode(text)
+            results.append((_rank(plaintext, {None: range(26)})[0][0],
+                            keyword, plaintext))
+        results.sort(reverse=True)
+        return results
+
 
 class Bacon:
     """
@@ -92,18 +485,94 @@ class Bacon:
         return plaintext
 
 
+def _playfair_moves(direction):
+    # For every pair of positions (as 0-24) in a Playfair square, the pair of
+    # positions their letters become, as a flat list indexed by 25 * a + b
+    moves = []
+    for a in range(25):
+        ar, ac = divmod(a, 5)
+        for b in range(25):
+            br, bc = divmod(b, 5)
+            if ar == br:
+                moves.append((ar * 5 + (ac + direction) % 5,
+                              br * 5 + (bc + direction) % 5))
+            elif ac == bc:
+                moves.append(((ar + direction) % 5 * 5 + ac,
+                              (br + direction) % 5 * 5 + bc))
+            else:
+                moves.append((ar * 5 + bc, br * 5 + ac))
+    return moves
+
+
+_PLAYFAIR_MOVES = {1: _playfair_moves(1), -1: _playfair_moves(-1)}
+_PLAYFAIR_DECODE_MOVES = _PLAYFAIR_MOVES[-1]
+# For each position in the square, the pairs of positions whose decoding
+# depends on the letter there: either it's one of the pair, or one of the
+# letters the pair becomes
+_PLAYFAIR_DEPENDENTS = [
+    [divmod(i, 25) for i, move in enumerate(_PLAYFAIR_DECODE_MOVES)
+     if position in divmod(i, 25) or position in move]
+    for position in range(25)
+]
+
+
+class _PlayfairSearch(_Search):
+    # A key is the square, as a list of 25 letters (0-25, without J)
+    def random_key(self, rng):
+        key = [x for x in range(26) if x != 9]
+        rng.shuffle(key)
+        return key
+
+    def mutate(self, key, rng):
+        key = key[:]
+        choice = rng.random()
+        if choice < .9:
+            a, b = rng.sample(range(25), 2)
+            key[a], key[b] = key[b], key[a]
+            units = {(key[i], key[j]) for i, j in _PLAYFAIR_DEPENDENTS[a]}
+            units.update((key[i], key[j]) for i, j in _PLAYFAIR_DEPENDENTS[b])
+            return key, units
+        a, b = rng.sample(range(5), 2)
+        if choice < .95:
+            # Swap two rows
+            key[5 * a:5 * a + 5], key[5 * b:5 * b + 5] = (
+                key[5 * b:5 * b + 5], key[5 * a:5 * a + 5])
+        else:
+            # Swap two columns
+            key[a::5], key[b::5] = key[b::5], key[a::5]
+        return key, None
+
+    def decrypt(self, key, units):
+        position = [0] * 26
+        for i, x in enumerate(key):
+            position[x] = i
+        plain = {}
+        for unit in self.counts if units is None else units:
+            if unit in self.counts:
+                a, b = _PLAYFAIR_DECODE_MOVES[25 * position[unit[0]] +
+                                              position[unit[1]]]
+                plain[unit] = (key[a], key[b])
+        return plain
+
+
 class Playfair:
     def __init__(self, keyword):
-        self._coords_to_letters = {}
-        self._letters_to_coords = {}
         alphabet = (keyword.upper() + ascii_uppercase).replace('J', 'I')
-        coordinate = 0
-        for letter in alphabet:
-            if letter.isalpha() and letter not in self._letters_to_coords:
-                coord = divmod(coordinate, 5)
-                self._letters_to_coords[letter] = coord
-                self._coords_to_letters[coord] = letter
-                coordinate += 1
+        self.square = ''.join(dict.fromkeys(
+            x for x in alphabet if x in ascii_uppercase
+        ))
+        # Every digraph of two different letters, and what it encodes and
+        # decodes to, so that translating a digraph is a single lookup
+        self._digraphs = {}
+        for direction, moves in _PLAYFAIR_MOVES.items():
+            self._digraphs[direction] = {
+                self.square[a] + self.square[b]:
+                    self.square[c] + self.square[d]
+                for (a, b), (c, d) in zip(itertools.product(range(25),
+                                                            repeat=2),
+                                          moves)
+                if a != b
+            }
 
     @staticmethod
     def _pad(letter):
@@ -111,40 +580,39 @@ class Playfair:
         # would just be "add 'X'" if it weren't for X itself
         return letter + ('Q' if letter == 'X' else 'X')
 
-    def _translate(self, text, direction):
+    def _translate_chunks(self, chunks, direction):
         """
-        Given a text and a direction, run it through the Playfair cipher.
-        "Direction" is 1 for encoding, -1 for decoding.
-        """
-        bigrams = bunch(alphafy(text.upper()).replace('J', 'I'), 2)
-        result = []
-
-        # Rather than looping through bigrams, we do this as a while loop, so
-        # that padding can be added as we go
-        while bigrams:
-            pair = bigrams.pop(0)
-            if len(pair) == 1:
-                pair = self._pad(pair)
-            a, b = pair
-            if a == b:
-                # If we need to add a padding letter, it'll realign all the
-                # subsequent pairs, so reset "bigrams" and restart the loop
-                bigrams = bunch(self._pad(a) + b + ''.join(bigrams), 2)
-                continue
+        Given an iterable of pieces of text and a direction, run them through
+        the Playfair cipher, yielding the translation of each piece as it
+        comes.  "Direction" is 1 for encoding, -1 for decoding.
 
-            ax, ay = self._letters_to_coords[a]
-            bx, by = self._letters_to_coords[b]
-            if ax == bx:
-                ay = (ay + direction) % 5
-                by = (by + direction) % 5
-            elif ay == by:
-                ax = (ax + direction) % 5
-                bx = (bx + direction) % 5
-            else:
-                ay, by = by, ay
-            result.append(self._coords_to_letters[(ax, ay)])
-            result.append(self._coords_to_letters[(bx, by)])
-        return ''.join(result)
+        A letter left over at the end of a piece is carried over to the
+        next; the last piece is padded if need be.
+        """
+        table = self._digraphs[direction]
+        carried = ''
+        for chunk in chunks:
+            letters = carried + ngrams.letters(chunk).replace('J', 'I')
+            result = []
+            i = 0
+            end = len(letters) - 1
+            while i < end:
+                pair = letters[i:i + 2]
+                if pair[0] == pair[1]:
+                    # Pad the first letter on its own, which shifts all the
+                    # subsequent pairs along by one
+                    result.append(table[self._pad(pair[0])])
+                    i += 1
+                else:
+                    result.append(table[pair])
+                    i += 2
+            carried = letters[i:]
+            yield ''.join(result)
+        if carried:
+            yield table[self._pad(carried)]
+
+    def _translate(self, text, direction):
+        return ''.join(self._translate_chunks([text], direction))
 
     def encode(self, text):
         """
@@ -157,3 +625,44 @@ class Playfair:
         Given ciphertext, decode it using the Playfair cipher.
         """
         return self._translate(text, -1)
+
+    def encode_chunks(self, chunks):
+        """
+        Given an iterable of pieces of plaintext (lines of a file, say),
+        encode them using the Playfair cipher, yielding the ciphertext piece
+        by piece without holding the whole text.
+        """
+        return self._translate_chunks(chunks, 1)
+
+    def decode_chunks(self, chunks):
+        """
+        Given an iterable of pieces of ciphertext, decode them using the
+        Playfair cipher, piece by piece.
+        """
+        return self._translate_chunks(chunks, -1)
+
+    @classmethod
+    def crack(cls, text, restarts=4, iterations=100000, seconds=None,
+              processes=None, seed=None):
+        """
+        Search for the key square of a Playfair ciphertext by simulated
+        annealing, and return a list of (score, square, plaintext) tuples,
+        most English-like first, where `square` is the 25 letters of the key
+        square (which can be passed to Playfair() as a keyword).  The
+        arguments are as for Substitution.crack().
+
+        Playfair needs a lot more text than a simple substitution does, and
+        the search is only as good as bigram statistics allow: expect to have
+        to tidy up the plaintext by hand.
+        """
+        codes = ngrams.to_codes(text.upper().replace('J', 'I'))
+        units = [tuple(codes[i:i + 2]) for i in range(0, len(codes) - 1, 2)]
+        if not units:
+            return []
+        results = []
+        for score, square in _crack_by_annealing(
+                _PlayfairSearch(units), restarts, iterations, seconds,
+                processes, seed):
+            square = ''.join(ascii_uppercase[x] for x in square)
+            results.append((score, square, cls(square).decode(text)))
+        return results
@@ -1,4 +1,10 @@
+import heapq
+import math
+from collections import defaultdict
+
 from puzzle_utils import data
+from puzzle_utils import fitness
+from puzzle_utils import ngrams
 
 
 def _decode(message, dictionary):
@@ -24,6 +30,163 @@ def morse(message):
     return _decode(message, data.MORSE_TO_LETTER)
 
 
+# Unspaced Morse: without the breaks between letters, a message can be read
+# in many ways (a string of dots alone could be any run of E, I, S, and H),
+# so these find the readings that look most like English.
+
+def _morse_trie(table):
+    # A prefix trie of nested dictionaries, one level per dot or dash, with a
+    # list of what each code stands for stored under the key None at the node
+    # where the code ends
+    trie = {}
+    for code, meaning in table:
+        node = trie
+        for symbol in code:
+            node = node.setdefault(symbol, {})
+        node.setdefault(None, []).append(meaning)
+    return trie
+
+
+_MORSE_TRIE = _morse_trie(data.MORSE_TO_LETTER.items())
+
+
+def _dots_and_dashes(message):
+    # Strip whitespace from an unspaced message, and check what's left
+    message = ''.join(message.split())
+    if message.strip('.-'):
+        raise ValueError('Unspaced Morse must be only dots and dashes')
+    return message
+
+
+def _matches(trie, message, start):
+    # Generate (end, meanings) for each code in the trie that the message
+    # has at `start`
+    node = trie
+    for end in range(start, len(message)):
+        node = node.get(message[end])
+        if node is None:
+            return
+        if None in node:
+            yield end + 1, node[None]
+
+
+def morse_readings(message):
+    """
+    Generate every way to read an unspaced Morse message (e.g. '...---...')
+    as letters.  There are a lot of them for anything but a short message;
+    see count_morse_readings() and unspaced_morse().
+    """
+    message = _dots_and_dashes(message)
+
+    def readings():
+        # Depth first, with a stack of (position, letters so far) rather than
+        # recursion, which would go a level deeper for every letter
+        stack = [(0, '')]
+        while stack:
+            start, reading = stack.pop()
+            if start == len(message):
+                yield reading
+                continue
+            matches = list(_matches(_MORSE_TRIE, message, start))
+            stack.extend((end, reading + letters[0])
+                         for end, letters in reversed(matches))
+
+    return readings()
+
+
+def count_morse_readings(message):
+    """
+    Return the number of ways to read an unspaced Morse message as letters.
+    """
+    message = _dots_and_dashes(message)
+    counts = [0] * len(message) + [1]
+    for start in range(len(message) - 1, -1, -1):
+        counts[start] = sum(counts[end] for end, _ in
+                            _matches(_MORSE_TRIE, message, start))
+    return counts[0]
+
+
+def unspaced_morse(message, words=None, scorer=None, results=10, beam=1000,
+                   letter_bonus=1.0):
+    """
+    Decode an unspaced Morse message, returning a list of up to `results`
+    plaintexts, best first.
+
+    Without `words`, every reading is scored by `scorer` (an NgramScorer
+    from `fitness`; by default the English bigram scorer), as the log
+    probability of each letter given the ones before it, plus `letter_bonus`
+    per letter (otherwise readings with fewer, longer letters always win).
+    The readings are built up letter by letter, keeping the best few ending
+    with each n - 1 letters at each point in the message (and at most `beam`
+    such endings), so the work grows with the length of the message, not
+    the number of readings.
+
+    With `words`, a list of words, only readings that split into words from
+    the list are returned, with spaces between the words: those with the
+    fewest words first, and among them, the ones whose words score best.
+    """
+    message = _dots_and_dashes(message)
+    if results < 1:
+        return []
+    if scorer is None:
+        scorer = fitness.ENGLISH
+    if words is None:
+        return _best_letters(message, scorer, results, beam, letter_bonus)
+    return _best_words(message, words, scorer, results)
+
+
+def _best_letters(message, scorer, results, beam, letter_bonus):
+    n = scorer.n
+    log_probs = scorer.conditional_log_probs()
+    # For each position in the message, a dict from the last n - 1 letters
+    # of the readings that get that far to a list of (score, reading)
+    reached = [defaultdict(list) for _ in range(len(message) + 1)]
+    reached[0][''] = [(0.0, '')]
+    for start in range(len(message)):
+        endings = heapq.nlargest(beam, reached[start].items(),
+                                 key=lambda item: max(item[1])[0])
+        reached[start] = None   # not needed again
+        for context, readings in endings:
+            readings = heapq.nlargest(results, readings)
+            for end, letters in _matches(_MORSE_TRIE, message, start):
+                gram = context + letters[0]
+                gain = log_probs[len(gram)][ngrams.pack(gram)] + letter_bonus
+                following = reached[end][gram[len(gram) - n + 1:]]
+                following.extend((score + gain, reading + letters[0])
+                                 for score, reading in readings)
+    finished = [entry for readings in reached[-1].values()
+                for entry in readings]
+    return [reading for _, reading in heapq.nlargest(results, finished)]
+
+
+def _best_words(message, words, scorer, results):
+    trie = _morse_trie(
+        (''.join(data.LETTER_TO_MORSE[letter] for letter in word),
+         (word, _word_score(word, scorer)))
+        for word in {ngrams.letters(word) for word in words} if word
+    )
+    # For each position in the message, the best few ways to read the rest
+    # of it as words, as ((number of words, -score), words); worked out from
+    # the end back, so each is built from ones already found
+    best = [None] * len(message) + [[((0, 0.0), ())]]
+    for start in range(len(message) - 1, -1, -1):
+        candidates = [
+            ((count + 1, cost - score), (word,) + rest)
+            for end, found in _matches(trie, message, start)
+            for word, score in found
+            for (count, cost), rest in best[end]
+        ]
+        best[start] = heapq.nsmallest(results, candidates)
+    return [' '.join(phrase) for _, phrase in best[0]]
+
+
+def _word_score(word, scorer):
+    # A word's score, relative to random letters, so that longer words
+    # aren't penalized just for having more n-grams
+    windows = max(len(word) - scorer.n + 1, 0)
+    return scorer.score(word) + windows * scorer.n * math.log(26)
+
+
 def semaphore(message):
     """Convert a semaphore message to plain text."""
     return _decode(message, data.SEMAPHORE_TO_LETTER)
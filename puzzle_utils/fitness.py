@@ -0,0 +1,204 @@
+"""
+Scoring how English-like a text is, for cracking ciphers.
+
+An NgramScorer holds the log probability of every n-gram in a flat array,
+indexed by the n-gram packed into a number (see `ngrams.pack()`), and scores
+a text as the sum of the log probabilities of all its (overlapping) n-grams.
+Higher is better; the scores of different texts are only comparable if they
+have the same number of letters.
+
+ENGLISH is a bigram scorer built from `data`.  Better tables (quadgrams are
+the usual choice) can be built from any large text with the `ngrams` module:
+
+>>> counts = ngrams.count_file('corpus.txt', sizes=(4,))
+>>> scorer = NgramScorer.from_counts(counts[4])
+"""
+import math
+import operator
+from array import array
+from itertools import accumulate
+from string import ascii_uppercase
+
+from puzzle_utils import data
+from puzzle_utils import ngrams
+
+# NumPy is optional (it just makes scoring faster), and slow to import, so
+# it's only imported the first time it could be used; until then, this is
+# False
+np = False
+
+
+def _numpy():
+    # Return NumPy (importing it if need be), or None if it isn't installed
+    global np
+    if np is False:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+    return np
+
+_TIMES_26 = (26).__mul__
+# Below this many letters, setting up NumPy arrays isn't worth it
+_NUMPY_MINIMUM = 10000
+
+
+def english_bigram_frequencies():
+    """
+    Return a frequency for every bigram.  Those in `data.BIGRAM_FREQUENCY`
+    are taken from there; the rest are estimated from the frequencies of
+    their letters, but capped below the rarest listed bigram.
+    """
+    rarest = min(data.BIGRAM_FREQUENCY.values())
+    return {
+        a + b: data.BIGRAM_FREQUENCY.get(
+            a + b,
+            min(data.LETTER_FREQUENCY[a] * data.LETTER_FREQUENCY[b], rarest)
+        )
+        for a in ascii_uppercase for b in ascii_uppercase
+    }
+
+
+class NgramScorer:
+    def __init__(self, table, floor=None):
+        """
+        `table` is a dict from n-grams (all the same length) to frequencies
+        or counts.  N-grams that aren't in it get the log probability
+        `floor`, which by default is that of something a tenth as common as
+        the rarest n-gram that is.
+        """
+        total = sum(table.values())
+        self.n = len(next(iter(table)))
+        if floor is None:
+            floor = math.log(min(table.values()) / total / 10)
+        self.floor = floor
+        self.log_probs = array('d', [floor]) * 26 ** self.n
+        for gram, frequency in table.items():
+            if len(gram) != self.n:
+                raise ValueError(f'N-grams of different lengths: {gram}')
+            self.log_probs[ngrams.pack(gram.upper())] = math.log(
+                frequency / total)
+        self._array = None
+        self._conditional = None
+
+    @classmethod
+    def from_counts(cls, counter, floor=None):
+        """
+        Build a scorer from a Counter of n-grams (from `ngrams`, say).
+        """
+        return cls(counter, floor)
+
+    @classmethod
+    def from_path(cls, path, floor=None):
+        """
+        Build a scorer from a table saved by `ngrams.save_frequencies()`.
+        """
+        return cls(ngrams.load_frequencies(path), floor)
+
+    def conditional_log_probs(self):
+        """
+        Return a list, for each k from 0 to n, of the log probability of the
+        last letter of each (packed) k-gram given the letters before it, from
+        the probabilities of the k-grams that the n-grams start with.  (The
+        list for k = 0 is empty.)  This is worked out once per scorer.
+        """
+        if self._conditional is None:
+            totals = [math.exp(log_prob) for log_prob in self.log_probs]
+            levels = [totals]
+            for _ in range(self.n - 1):
+                totals = [sum(totals[i:i + 26])
+                          for i in range(0, len(totals), 26)]
+                levels.append(totals)
+            levels.append([sum(totals)])
+            levels.reverse()
+            self._conditional = [[]] + [
+                [math.log(total / levels[k - 1][i // 26])
+                 for i, total in enumerate(levels[k])]
+                for k in range(1, self.n + 1)
+            ]
+        return self._conditional
+
+    def _packed(self, codes):
+        # An iterator over the packed n-grams of `codes`, sliding along one
+        # letter at a time, built out of maps so that the loop runs in C
+        windows = len(codes) - self.n + 1
+        if windows <= 0:
+            return iter(())
+        packed = codes[:windows]
+        for i in range(1, self.n):
+            packed = map(operator.add, map(_TIMES_26, packed),
+                         codes[i:i + windows])
+        return packed
+
+    def _numpy_log_probs(self):
+        if self._array is None:
+            self._array = np.frombuffer(self.log_probs, dtype=np.float64)
+        return self._array
+
+    def _numpy_packed(self, codes):
+        codes = np.frombuffer(codes, dtype=np.uint8)
+        windows = len(codes) - self.n + 1
+        if windows <= 0:
+            return np.zeros(0, dtype=np.int64)
+        packed = np.zeros(windows, dtype=np.int64)
+        for i in range(self.n):
+            packed *= 26
+            packed += codes[i:i + windows]
+        return packed
+
+    def score_codes(self, codes, use_numpy=False):
+        """
+        Score a text already converted to letter codes (by
+        `ngrams.to_codes()`, or any bytes-like sequence of 0-25).  This is
+        the one to call in a tight loop.
+        """
+        if use_numpy:
+            if _numpy() is None:
+                raise ImportError('Scoring with NumPy requires NumPy')
+            packed = self._numpy_packed(codes)
+            return float(self._numpy_log_probs()[packed].sum())
+        return sum(map(self.log_probs.__getitem__, self._packed(codes)))
+
+    def score(self, text, use_numpy=None):
+        """
+        Score a text.  By default, long texts are scored with NumPy if it's
+        installed.
+        """
+        codes = ngrams.to_codes(text)
+        if use_numpy is None:
+            use_numpy = (len(codes) >= _NUMPY_MINIMUM
+                         and _numpy() is not None)
+        return self.score_codes(codes, use_numpy)
+
+    def score_many(self, texts, use_numpy=None):
+        """
+        Score a batch of texts, returning a list of scores in the same
+        order.  With NumPy (used by default if it's installed), the n-grams
+        of the whole batch are scored at once.
+        """
+        encoded = [ngrams.to_codes(text) for text in texts]
+        if use_numpy is None:
+            use_numpy = _numpy() is not None
+        if not use_numpy:
+            return [self.score_codes(codes) for codes in encoded]
+        if _numpy() is None:
+            raise ImportError('Scoring with NumPy requires NumPy')
+        if not encoded:
+            return []
+
+        # Score every window of the texts joined together, then add up the
+        # windows that lie inside each text (not across two of them)
+        packed = self._numpy_packed(b''.join(encoded))
+        scores = self._numpy_log_probs()[packed]
+        totals = np.concatenate(([0], np.cumsum(scores)))
+        starts = list(accumulate((len(codes) for codes in encoded),
+                                 initial=0))
+        return [
+            float(totals[start + windows] - totals[start])
+            if windows > 0 else 0.0
+            for start, windows in zip(starts,
+                                      (len(c) - self.n + 1 for c in encoded))
+        ]
+
+
+ENGLISH = NgramScorer(english_bigram_frequencies())
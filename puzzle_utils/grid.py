@@ -5,6 +5,26 @@ To be clear, these are *grid* utilities, not *coordinate plane* utilities.
 That means that (0, 0) is in the upper left, and the row number (y axis)
 comes before the column number (x axis), because that's how we think of grids.
 """
+import heapq
+import multiprocessing
+from collections import deque
+
+# NumPy is optional (only ArrayGrid needs it), and slow to import, so it's
+# only imported the first time it could be used; until then, this is False
+np = False
+
+
+def _numpy():
+    # Return NumPy (importing it if need be), or None if it isn't installed
+    global np
+    if np is False:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+    return np
+
+
 # That is:
 #
 #        GRID              PLANE
@@ -74,19 +94,52 @@ def move(start, direction, distance=1):
     return (x + dx * distance, y + dy * distance)
 
 
+def _split_lines(lines, sep):
+    # Generate the cells of each line, for the from_lines() methods
+    for line in lines:
+        line = line.rstrip('\r\n')
+        yield line if sep is None else line.split(sep)
+
+
+def _make_trie(words):
+    # A prefix trie of nested dictionaries, one level per character, with the
+    # word itself stored under the key None at the node where it ends
+    trie = {}
+    for word in words:
+        node = trie
+        for character in word:
+            node = node.setdefault(character, {})
+        node[None] = word
+    return trie
+
+
+def _descend(node, cell):
+    # Follow a trie through the characters of a cell (which are usually, but
+    # not necessarily, single letters), returning None if it runs out
+    for character in cell:
+        node = node.get(character)
+        if node is None:
+            return None
+    return node
+
+
 class Grid(dict):
     """
     A subclass of dictionary to hold rectangular grids, i.e. mappings from
     (row, column) coordinates to the (usually length-1) string at that
     coordinate.
     """
-    def __init__(self, grid):
+    def __init__(self, grid, rows=None, columns=None):
         # Note that this does not have error-checking to ensure that the grid
         # doesn't have holes or is otherwise going to cause problems later.
+        # If the caller already knows the dimensions, they can be passed in,
+        # which saves a pass over every key.
         super().__init__(grid)
-        mr, mc = max(self)
-        self.rows = mr + 1
-        self.columns = mc + 1
+        if rows is None or columns is None:
+            mr, mc = max(self)
+            rows, columns = mr + 1, mc + 1
+        self.rows = rows
+        self.columns = columns
 
     @classmethod
     def from_text(cls, grid_text, sep=None):
@@ -95,15 +148,32 @@ class Grid(dict):
         default, rows are expected to be undelimited, but a separator `sep`
         can be spcified.
         """
-        if sep is None:
-            sepfunc = lambda x: x
-        else:
-            sepfunc = lambda x: x.split(sep)
+        return cls.from_lines(grid_text.splitlines(), sep)
+
+    @classmethod
+    def from_lines(cls, lines, sep=None):
+        """
+        As from_text(), but given an iterable of lines (with or without line
+        endings), which are read one at a time.
+        """
         dic = {}
-        for row, line in enumerate(grid_text.splitlines()):
-            for col, entry in enumerate(sepfunc(line)):
+        # The dimensions come from the last row with anything in it, which is
+        # what max() over the keys would find
+        rows = columns = 0
+        for row, cells in enumerate(_split_lines(lines, sep)):
+            for col, entry in enumerate(cells):
                 dic[(row, col)] = entry
-        return cls(dic)
+            if cells:
+                rows, columns = row + 1, len(cells)
+        return cls(dic, rows, columns)
+
+    @classmethod
+    def from_file(cls, path, sep=None):
+        """
+        As from_text(), but reads the grid from a file, one line at a time.
+        """
+        with open(path) as f:
+            return cls.from_lines(f, sep)
 
     @classmethod
     def from_dimensions(cls, row, col, default=''):
@@ -111,7 +181,21 @@ class Grid(dict):
         Get an empty grid with the given dimensions.  All cells will be filled
         with the provided default value (default: the empty string).
         """
-        return cls({(a, b): default for b in range(col) for a in range(row)})
+        return cls({(a, b): default for b in range(col) for a in range(row)},
+                   row, col)
+
+    def to_compact(self):
+        """
+        Return the equivalent CompactGrid.
+        """
+        return CompactGrid.from_grid(self)
+
+    def to_array(self, dtype=None):
+        """
+        Return the equivalent ArrayGrid (which requires NumPy); see
+        ArrayGrid.from_grid() for `dtype`.
+        """
+        return ArrayGrid.from_grid(self, dtype)
 
     def to_text(self, sep=''):
         """
@@ -145,12 +229,19 @@ class Grid(dict):
         Coordinates outside the grid will be skipped (so a coordinate on an
         edge will have three neighbors, or five if diaonals are included).
         """
+        return [self[nb] for nb in self.get_neighbor_coords(coord, diagonals)]
+
+    def get_neighbor_coords(self, coord, diagonals=False):
+        """
+        As get_neighbors(), but returns the coordinates of the adjacent cells
+        rather than their contents.
+        """
         neighbors = []
         directions = DIRECTIONS if diagonals else CARDINALS
         for direction in directions:
             nb = move(coord, direction)
             if nb in self:
-                neighbors.append(self[nb])
+                neighbors.append(nb)
         return neighbors
 
     def get_line(self, coord, direction, distance, past_edge=None):
@@ -168,3 +259,731 @@ class Grid(dict):
             return
         return [self.get(move(coord, direction, i), past_edge)
                 for i in range(distance)]
+
+    def find_words(self, words, directions=DIRECTIONS):
+        """
+        Given an iterable of words, find all of them that appear in the grid
+        in a straight line (as in a word search), and return a list of
+        (word, start coordinate, direction) tuples.  By default all eight
+        directions are searched, but e.g. CARDINALS can be given instead.
+
+        Words are matched exactly, so they should be in the same case as the
+        grid.  A word that fits in a single cell is found once, with the
+        direction None.
+        """
+        trie = _make_trie(words)
+        rows = [self.get_row(r) for r in range(self.rows)]
+        found = []
+        for r, row in enumerate(rows):
+            for c, cell in enumerate(row):
+                start_node = _descend(trie, cell)
+                if start_node is None:
+                    continue
+                if None in start_node:
+                    found.append((start_node[None], (r, c), None))
+                for direction in directions:
+                    dr, dc = direction
+                    node = start_node
+                    nr, nc = r, c
+                    # Walk outward for as long as what's been read so far is
+                    # the start of some word
+                    while True:
+                        nr += dr
+                        nc += dc
+                        if not (0 <= nr < self.rows and 0 <= nc < self.columns):
+                            break
+                        node = _descend(node, rows[nr][nc])
+                        if node is None:
+                            break
+                        if None in node:
+                            found.append((node[None], (r, c), direction))
+        return found
+
+    def find_paths(self, words, diagonals=True, processes=None):
+        """
+        Given an iterable of words, find all of them that can be spelled by a
+        path of adjacent cells, using no cell more than once (as in Boggle).
+        Returns a dictionary mapping each word found to the coordinates of one
+        such path.
+
+        With `processes`, the starting cells are divided among that many
+        worker processes, which is worthwhile for large grids.
+        """
+        trie = _make_trie(words)
+        coords = [(r, c) for r in range(self.rows) for c in range(self.columns)]
+        cells = [self[coord] for coord in coords]
+        neighbors = [
+            [r * self.columns + c
+             for r, c in self.get_neighbor_coords(coord, diagonals)]
+            for coord in coords
+        ]
+        starts = range(len(cells))
+        if processes:
+            with multiprocessing.Pool(processes, _init_path_worker,
+                                      (cells, neighbors, trie)) as pool:
+                results = pool.map(_path_worker, starts)
+        else:
+            results = [_paths_from(start, cells, neighbors, trie)
+                       for start in starts]
+
+        found = {}
+        for result in results:
+            for word, path in result.items():
+                found.setdefault(word, tuple(coords[i] for i in path))
+        return found
+
+    def bfs(self, start, passable=None, diagonals=False):
+        """
+        Given a starting coordinate, return a dictionary mapping every cell
+        reachable from it to the number of steps it takes to get there.
+
+        `passable` is a function that takes the contents of a cell and returns
+        whether it can be entered (by default, every cell can); `diagonals`
+        says whether diagonal steps are allowed.  If `start` itself can't be
+        entered, nothing is reachable from it, and the dictionary is empty.
+        """
+        maze = _Maze(self, passable, diagonals)
+        source = maze.index(start)
+        if not maze.open[source]:
+            return {}
+        return maze.to_coords(maze.bfs(source))
+
+    def dijkstra(self, start, cost, passable=None, diagonals=False):
+        """
+        As bfs(), but each step costs `cost(contents)` of the cell being
+        entered rather than 1, and the distances are the cheapest total cost.
+        `cost` is only called on cells that `passable` allows.
+        """
+        maze = _Maze(self, passable, diagonals, cost)
+        source = maze.index(start)
+        if not maze.open[source]:
+            return {}
+        return maze.to_coords(maze.astar(source)[0])
+
+    def shortest_path(self, start, goal, passable=None, cost=None,
+                      diagonals=False):
+        """
+        Return the shortest path from `start` to `goal` as a list of
+        coordinates (including both ends), or None if there isn't one.
+        `passable` and `diagonals` are as for bfs(); if `cost` is given, it's
+        as for dijkstra(), and the path is the cheapest one.
+
+        Weighted searches use A*, with the Manhattan distance (or with
+        diagonals, the Chebyshev distance) times the smallest cost of any
+        cell, which never overestimates, as its heuristic.
+        """
+        maze = _Maze(self, passable, diagonals, cost)
+        source = maze.index(start)
+        target = maze.index(goal)
+        if not (maze.open[source] and maze.open[target]):
+            return None
+        if cost is None:
+            parents = maze.bfs(source, target, parents=True)
+        else:
+            parents = maze.astar(source, target)[1]
+        if target != source and parents[target] is None:
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(parents[path[-1]])
+        return [maze.coord(i) for i in reversed(path)]
+
+    def flood_fill(self, start, passable=None, diagonals=False):
+        """
+        Return the set of coordinates reachable from `start` (including
+        `start` itself, unless it can't be entered, in which case the set is
+        empty).  `passable` and `diagonals` are as for bfs().
+        """
+        return set(self.bfs(start, passable, diagonals))
+
+    def connected_components(self, passable=None, diagonals=False):
+        """
+        Divide the passable cells of the grid into regions that are connected
+        to each other, and return a list of sets of coordinates, one per
+        region.  `passable` and `diagonals` are as for bfs().
+        """
+        maze = _Maze(self, passable, diagonals)
+        # Filling a region closes it off, so every cell is only visited once
+        unfilled = maze.open
+        components = []
+        i = unfilled.find(1)
+        while i != -1:
+            components.append({maze.coord(j) for j in maze.fill(i)})
+            i = unfilled.find(1, i + 1)
+        return components
+
+
+def _paths_from(start, cells, neighbors, trie):
+    # Depth-first search for find_paths(), from one starting cell.  Cells are
+    # numbered in row-major order; the cells on the current path are tracked
+    # as bits of an integer, and the path itself is a single list that grows
+    # and shrinks as the search goes, so nothing is copied along the way.
+    found = {}
+    path = []
+
+    def search(index, node, visited):
+        node = _descend(node, cells[index])
+        if node is None:
+            return
+        path.append(index)
+        if None in node:
+            found.setdefault(node[None], tuple(path))
+        visited |= 1 << index
+        for neighbor in neighbors[index]:
+            if not visited >> neighbor & 1:
+                search(neighbor, node, visited)
+        path.pop()
+
+    search(start, trie, 0)
+    return found
+
+
+# Each worker process for find_paths() gets the grid and trie once, rather
+# than with every starting cell
+_path_worker_state = None
+
+
+def _init_path_worker(cells, neighbors, trie):
+    global _path_worker_state
+    _path_worker_state = (cells, neighbors, trie)
+
+
+def _path_worker(start):
+    return _paths_from(start, *_path_worker_state)
+
+
+class _Maze:
+    # The search methods work on a flattened copy of the grid, with a border
+    # of impassable cells all the way around, so that neighbors are always a
+    # fixed offset away (precomputed once per search) and never need to be
+    # checked against the edges of the grid.  Cells are numbered in row-major
+    # order, counting the border.
+    def __init__(self, grid, passable=None, diagonals=False, cost=None):
+        self.rows = grid.rows
+        self.columns = grid.columns
+        self.width = width = grid.columns + 2
+        self.diagonals = diagonals
+        self.offsets = [dr * width + dc
+                        for dr, dc in (DIRECTIONS if diagonals else CARDINALS)]
+
+        self.open = bytearray(width * (grid.rows + 2))
+        self.costs = None if cost is None else [0] * len(self.open)
+        for r in range(grid.rows):
+            row = grid.get_row(r)
+            start = (r + 1) * width + 1
+            if passable is None:
+                self.open[start:start + len(row)] = b'\x01' * len(row)
+            else:
+                self.open[start:start + len(row)] = bytes(
+                    bool(passable(cell)) for cell in row
+                )
+            if cost is not None:
+                # Walls and the like needn't have a cost (or be numbers)
+                self.costs[start:start + len(row)] = [
+                    cost(cell) if is_open else 0
+                    for cell, is_open in zip(row,
+                                             self.open[start:start + len(row)])
+                ]
+
+    def index(self, coord):
+        r, c = coord
+        if not (0 <= r < self.rows and 0 <= c < self.columns):
+            raise KeyError(coord)
+        return (r + 1) * self.width + c + 1
+
+    def coord(self, index):
+        r, c = divmod(index, self.width)
+        return (r - 1, c - 1)
+
+    def to_coords(self, distances):
+        return {self.coord(i): distance for i, distance in enumerate(distances)
+                if distance is not None and distance >= 0}
+
+    def bfs(self, source, target=None, parents=False):
+        # Returns the list of distances (-1 for unreached cells), or if
+        # `parents` is set, the list of each cell's predecessor
+        distances = [-1] * len(self.open)
+        previous = [None] * len(self.open) if parents else None
+        distances[source] = 0
+        queue = deque([source])
+        is_open = self.open
+        offsets = self.offsets
+        while queue:
+            current = queue.popleft()
+            if current == target:
+                break
+            step = distances[current] + 1
+            for offset in offsets:
+                neighbor = current + offset
+                if is_open[neighbor] and distances[neighbor] < 0:
+                    distances[neighbor] = step
+                    if parents:
+                        previous[neighbor] = current
+                    queue.append(neighbor)
+        return previous if parents else distances
+
+    def fill(self, source):
+        # Returns the list of cells reachable from `source`, marking them as
+        # closed along the way
+        is_open = self.open
+        offsets = self.offsets
+        is_open[source] = 0
+        reached = [source]
+        for current in reached:
+            for offset in offsets:
+                neighbor = current + offset
+                if is_open[neighbor]:
+                    is_open[neighbor] = 0
+                    reached.append(neighbor)
+        return reached
+
+    def astar(self, source, target=None):
+        # Returns the lists of distances (None for unreached cells) and of
+        # predecessors.  Without a target, this is just Dijkstra's algorithm.
+        distances = [None] * len(self.open)
+        previous = [None] * len(self.open)
+        distances[source] = 0
+        is_open = self.open
+        costs = self.costs
+        offsets = self.offsets
+
+        if target is None:
+            def heuristic(index):
+                return 0
+        else:
+            cheapest = min((c for c, o in zip(costs, is_open) if o), default=0)
+            tr, tc = divmod(target, self.width)
+
+            def heuristic(index):
+                r, c = divmod(index, self.width)
+                if self.diagonals:
+                    return cheapest * max(abs(r - tr), abs(c - tc))
+                return cheapest * (abs(r - tr) + abs(c - tc))
+
+        heap = [(heuristic(source), 0, source)]
+        while heap:
+            _, distance, current = heapq.heappop(heap)
+            if current == target:
+                break
+            if distance > distances[current]:
+                continue    # a stale entry; it was reached more cheaply
+            for offset in offsets:
+                neighbor = current + offset
+                if not is_open[neighbor]:
+                    continue
+                new_distance = distance + costs[neighbor]
+                old_distance = distances[neighbor]
+                if old_distance is None or new_distance < old_distance:
+                    distances[neighbor] = new_distance
+                    previous[neighbor] = current
+                    heapq.heappush(heap, (new_distance + heuristic(neighbor),
+                                          new_distance, neighbor))
+        return distances, previous
+
+
+class CompactGrid:
+    """
+    A rectangular grid with the same interface as Grid, but stored as a
+    single flat list in row-major order rather than as a dictionary, which
+    takes a fraction of the memory (and time) for large grids.
+
+    Like a Grid, it can be indexed by (row, column) coordinates, and iterating
+    over it gives the coordinates.  Grid.to_compact() and to_grid() convert
+    between the two.
+    """
+    __slots__ = ('rows', 'columns', 'cells')
+
+    def __init__(self, rows, columns, cells):
+        if len(cells) != rows * columns:
+            raise ValueError('Wrong number of cells for grid dimensions')
+        self.rows = rows
+        self.columns = columns
+        self.cells = cells
+
+    @classmethod
+    def from_text(cls, grid_text, sep=None):
+        """
+        Given a string as line-separated rows, make a CompactGrid out of it.
+        (See Grid.from_text().)  Rows must all be the same length.
+        """
+        return cls.from_lines(grid_text.splitlines(), sep)
+
+    @classmethod
+    def from_lines(cls, lines, sep=None):
+        """
+        As from_text(), but given an iterable of lines (with or without line
+        endings), which are read one at a time straight into the grid.
+        """
+        rows = 0
+        columns = None
+        cells = []
+        # Blank lines are fine at the end (as after a file's last newline),
+        # but nowhere else
+        blanks = 0
+        for line in _split_lines(lines, sep):
+            if not line:
+                blanks += 1
+                continue
+            if columns is None:
+                columns = len(line)
+            if blanks or len(line) != columns:
+                raise ValueError('Grid rows are not all the same length')
+            cells.extend(line)
+            rows += 1
+        return cls(rows, columns or 0, cells)
+
+    @classmethod
+    def from_file(cls, path, sep=None):
+        """
+        As from_text(), but reads the grid from a file, one line at a time.
+        """
+        with open(path) as f:
+            return cls.from_lines(f, sep)
+
+    @classmethod
+    def from_dimensions(cls, row, col, default=''):
+        """
+        Get an empty grid with the given dimensions.  All cells will be filled
+        with the provided default value (default: the empty string).
+        """
+        return cls(row, col, [default] * (row * col))
+
+    @classmethod
+    def from_grid(cls, grid):
+        """
+        Given a Grid, return the equivalent CompactGrid.
+        """
+        return cls(grid.rows, grid.columns,
+                   [grid[(r, c)] for r in range(grid.rows)
+                    for c in range(grid.columns)])
+
+    def to_grid(self):
+        """
+        Return the equivalent Grid.
+        """
+        return Grid(zip(self, self.cells), self.rows, self.columns)
+
+    def _index(self, coord):
+        r, c = coord
+        if 0 <= r < self.rows and 0 <= c < self.columns:
+            return r * self.columns + c
+        raise KeyError(coord)
+
+    def __getitem__(self, coord):
+        return self.cells[self._index(coord)]
+
+    def __setitem__(self, coord, value):
+        self.cells[self._index(coord)] = value
+
+    def __contains__(self, coord):
+        r, c = coord
+        return 0 <= r < self.rows and 0 <= c < self.columns
+
+    def __iter__(self):
+        return ((r, c) for r in range(self.rows) for c in range(self.columns))
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __eq__(self, other):
+        if isinstance(other, CompactGrid):
+            return ((self.rows, self.columns, self.cells)
+                    == (other.rows, other.columns, other.cells))
+        return NotImplemented
+
+    def get(self, coord, default=None):
+        return self[coord] if coord in self else default
+
+    def to_text(self, sep=''):
+        """
+        Turn the grid into a printable string, with rows separated by
+        newlines and the cells in each row separated by `sep`.
+        """
+        return '\n'.join(sep.join(self.get_row(r)) for r in range(self.rows))
+
+    def get_row(self, rownum):
+        """
+        Given a row number, return the contents of that row (as a list).
+        """
+        if not 0 <= rownum < self.rows:
+            raise KeyError((rownum, 0))
+        start = rownum * self.columns
+        return self.cells[start:start + self.columns]
+
+    def get_column(self, colnum):
+        """
+        Given a column number, return the contents of that column (as a list).
+        """
+        if not 0 <= colnum < self.columns:
+            raise KeyError((0, colnum))
+        return self.cells[colnum::self.columns]
+
+    def get_neighbors(self, coord, diagonals=False):
+        """
+        Given a coordinate, get a list of the contents of adjacent coordinates,
+        clockwise from north.  (See Grid.get_neighbors().)
+        """
+        cells = self.cells
+        columns = self.columns
+        return [cells[r * columns + c]
+                for r, c in self.get_neighbor_coords(coord, diagonals)]
+
+    def get_neighbor_coords(self, coord, diagonals=False):
+        """
+        As get_neighbors(), but returns the coordinates of the adjacent cells
+        rather than their contents.
+        """
+        r, c = coord
+        rows = self.rows
+        columns = self.columns
+        return [(r + dr, c + dc)
+                for dr, dc in (DIRECTIONS if diagonals else CARDINALS)
+                if 0 <= r + dr < rows and 0 <= c + dc < columns]
+
+    # The rest of the interface only relies on the methods above, so it can
+    # be shared with Grid as is
+    get_line = Grid.get_line
+    to_array = Grid.to_array
+    find_words = Grid.find_words
+    find_paths = Grid.find_paths
+    bfs = Grid.bfs
+    dijkstra = Grid.dijkstra
+    shortest_path = Grid.shortest_path
+    flood_fill = Grid.flood_fill
+    connected_components = Grid.connected_components
+
+
+class ArrayGrid:
+    """
+    A grid backed by a two-dimensional NumPy array, for operations on whole
+    rows, columns, and diagonals at once.  Rows, columns, diagonals, and the
+    rotated and transposed grids are all views of the same array rather than
+    copies (so diagonals, in particular, are read-only).
+
+    This requires NumPy; Grid and CompactGrid don't, and have most of the
+    same methods.
+
+    Unlike theirs, the cells of an ArrayGrid have a fixed width: by default,
+    that of the widest cell it started with.  Setting a cell to a longer
+    string raises ValueError, rather than letting NumPy cut it short; pass a
+    wider `dtype` (e.g. 'U5') to from_grid() to leave room.
+    """
+    def __init__(self, array):
+        if _numpy() is None:
+            raise ImportError('ArrayGrid requires NumPy')
+        self.array = np.asarray(array)
+        self.rows, self.columns = self.array.shape
+
+    @classmethod
+    def from_grid(cls, grid, dtype=None):
+        """
+        Given a Grid or CompactGrid, return the equivalent ArrayGrid.  The
+        array's `dtype` is whatever NumPy picks for the cells, unless given.
+        """
+        if _numpy() is None:
+            raise ImportError('ArrayGrid requires NumPy')
+        return cls(np.array([grid.get_row(r) for r in range(grid.rows)],
+                            dtype=dtype))
+
+    @classmethod
+    def from_text(cls, grid_text, sep=None, dtype=None):
+        """
+        Given a string as line-separated rows, make an ArrayGrid out of it.
+        (See Grid.from_text().)  Rows must all be the same length.
+        """
+        return cls.from_grid(CompactGrid.from_text(grid_text, sep), dtype)
+
+    def to_grid(self):
+        """
+        Return the equivalent Grid.
+        """
+        return Grid({(r, c): cell
+                     for r, row in enumerate(self.array.tolist())
+                     for c, cell in enumerate(row)}, self.rows, self.columns)
+
+    def to_text(self, sep=''):
+        """
+        Turn the grid into a printable string, with rows separated by
+        newlines and the cells in each row separated by `sep`.
+        """
+        return '\n'.join(sep.join(row) for row in self.array.tolist())
+
+    def __getitem__(self, coord):
+        return self.array[coord]
+
+    def __setitem__(self, coord, value):
+        dtype = self.array.dtype
+        if (isinstance(value, str) and dtype.kind == 'U'
+                and len(value) > dtype.itemsize // 4):
+            raise ValueError(f'Cell value {value!r} is too wide for {dtype}')
+        self.array[coord] = value
+
+    def get_row(self, rownum):
+        """
+        Given a row number, return that row (as a view).
+        """
+        return self.array[rownum]
+
+    def get_column(self, colnum):
+        """
+        Given a column number, return that column (as a view).
+        """
+        return self.array[:, colnum]
+
+    def get_rows(self):
+        """
+        Return all the rows of the grid, in order.
+        """
+        return list(self.array)
+
+    def get_columns(self):
+        """
+        Return all the columns of the grid, in order.
+        """
+        return list(self.array.T)
+
+    def get_diagonals(self):
+        """
+        Return all the diagonals of the grid that run from upper left to lower
+        right, starting from the lower left corner.
+        """
+        return [self.array.diagonal(k)
+                for k in range(1 - self.rows, self.columns)]
+
+    def get_antidiagonals(self):
+        """
+        Return all the diagonals of the grid that run from upper right to lower
+        left, starting from the upper left corner.
+        """
+        flipped = self.array[:, ::-1]
+        return [flipped.diagonal(k)
+                for k in range(self.columns - 1, -self.rows, -1)]
+
+    def rotate(self, times=1):
+        """
+        Return the grid rotated 90 degrees clockwise `times` times.
+        """
+        return type(self)(np.rot90(self.array, -times))
+
+    def transpose(self):
+        """
+        Return the grid flipped along its main diagonal.
+        """
+        return type(self)(self.array.T)
+
+    def get_windows(self, height, width):
+        """
+        Return every height-by-width subgrid, as a four-dimensional array,
+        indexed first by the coordinate of each window's upper left corner.
+        """
+        return np.lib.stride_tricks.sliding_window_view(
+            self.array, (height, width)
+        )
+
+
+class Automaton:
+    """
+    Runs a cellular automaton (Conway's Life, say, or anything else where each
+    cell's next state depends only on itself and its neighbors) on a grid.
+
+    `rule` is a function that takes the contents of a cell and a list of its
+    neighbors' contents (as from Grid.get_neighbors()) and returns the cell's
+    new contents.  Only cells next to something that changed in the previous
+    generation are recomputed.  The state of the grid is hashed as it goes,
+    so that once it starts repeating, run() can skip ahead.
+    """
+    def __init__(self, grid, rule, diagonals=True):
+        self.rows = grid.rows
+        self.columns = grid.columns
+        self.rule = rule
+        self.diagonals = diagonals
+        self.generation = 0
+        # The period, once the automaton is known to be in a cycle
+        self.period = None
+
+        # Two copies of the cells: each generation is computed from one into
+        # the other, and then they swap.  Any cell that isn't recomputed is the
+        # same in both (see step()), so nothing has to be copied over.
+        self._current = [cell for r in range(grid.rows)
+                         for cell in grid.get_row(r)]
+        self._next = list(self._current)
+        self._active = set(range(len(self._current)))
+        # Each cell's neighbors, filled in the first time they're needed
+        self._neighbor_table = [None] * len(self._current)
+
+        # The hash of the whole state is the XOR of a hash for each cell, so
+        # that it can be updated one cell at a time
+        self._hash = 0
+        for i, cell in enumerate(self._current):
+            self._hash ^= hash((i, cell))
+        self._seen = {self._hash: 0}
+
+    def _neighbors(self, index):
+        neighbors = self._neighbor_table[index]
+        if neighbors is None:
+            r, c = divmod(index, self.columns)
+            neighbors = self._neighbor_table[index] = tuple(
+                (r + dr) * self.columns + c + dc
+                for dr, dc in (DIRECTIONS if self.diagonals else CARDINALS)
+                if 0 <= r + dr < self.rows and 0 <= c + dc < self.columns
+            )
+        return neighbors
+
+    def step(self):
+        """
+        Advance by one generation, and return the number of cells that
+        changed.
+        """
+        current, following = self._current, self._next
+        rule = self.rule
+        table = self._neighbor_table
+        neighbors = self._neighbors
+        changed = []
+        for i in self._active:
+            cell = current[i]
+            new = rule(cell, [current[j] for j in table[i] or neighbors(i)])
+            following[i] = new
+            if new != cell:
+                changed.append(i)
+                self._hash ^= hash((i, cell)) ^ hash((i, new))
+
+        # A cell that changed is now different in the two copies, but it (and
+        # its neighbors) will be recomputed next time, so the copies will agree
+        # everywhere else
+        self._active = set(changed)
+        for i in changed:
+            self._active.update(table[i])
+        self._current, self._next = following, current
+        self.generation += 1
+
+        if self.period is None and self._hash in self._seen:
+            self.period = self.generation - self._seen[self._hash]
+        self._seen.setdefault(self._hash, self.generation)
+        return len(changed)
+
+    def run(self, generations):
+        """
+        Advance by the given number of generations (skipping over whole cycles
+        once the automaton is found to be in one), and return self.
+        """
+        target = self.generation + generations
+        while self.generation < target:
+            if self.period is not None:
+                cycles = (target - self.generation) // self.period
+                self.generation += cycles * self.period
+                if self.generation == target:
+                    break
+            self.step()
+        return self
+
+    def to_grid(self):
+        """
+        Return the current state as a Grid.
+        """
+        return self.to_compact().to_grid()
+
+    def to_compact(self):
+        """
+        Return the current state as a CompactGrid.
+        """
+        return CompactGrid(self.rows, self.columns, list(self._current))
@@ -0,0 +1,212 @@
+"""
+Counting letter n-grams (unigrams, bigrams, trigrams, quadgrams...) in text,
+and turning the counts into frequency tables like those in `data`.
+
+N-grams are counted over the letters of a text only, uppercased, so (as in
+`data.BIGRAM_FREQUENCY`) they bridge spaces and punctuation: "of the" has the
+bigrams OF, FT, TH, and HE.
+"""
+import json
+import multiprocessing
+import re
+from collections import Counter
+from itertools import islice
+from string import ascii_uppercase
+
+# NumPy is optional (it just makes counting faster), and slow to import, so
+# it's only imported the first time it could be used; until then, this is
+# False
+np = False
+
+
+def _numpy():
+    # Return NumPy (importing it if need be), or None if it isn't installed
+    global np
+    if np is False:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+    return np
+
+SIZES = (1, 2, 3, 4)
+
+_NOT_LETTERS = re.compile('[^A-Z]+')
+_TO_CODES = bytes.maketrans(ascii_uppercase.encode(), bytes(range(26)))
+# Below this many letters, setting up NumPy arrays isn't worth it
+_NUMPY_MINIMUM = 10000
+
+
+def letters(text):
+    """
+    Given a text, return just its letters (A-Z), uppercased.
+    """
+    return _NOT_LETTERS.sub('', text.upper())
+
+
+def to_codes(text):
+    """
+    Given a text, return its letters as bytes 0-25 (for A-Z).
+    """
+    return letters(text).encode().translate(_TO_CODES)
+
+
+def pack(gram):
+    """
+    Given an n-gram, return it as a single number: its letters (as 0-25) as
+    the digits of a base-26 number.  For example, pack('BA') == 26.
+    """
+    number = 0
+    for letter in gram:
+        number = number * 26 + ord(letter) - 65
+    return number
+
+
+def unpack(number, n):
+    """
+    The inverse of pack(): turn a number back into an n-gram of length `n`.
+    """
+    gram = []
+    for _ in range(n):
+        number, letter = divmod(number, 26)
+        gram.append(ascii_uppercase[letter])
+    return ''.join(reversed(gram))
+
+
+def _count_python(text, n):
+    if n == 1:
+        return Counter(text)
+    return Counter(map(''.join, zip(*(islice(text, i, None)
+                                      for i in range(n)))))
+
+
+def _count_numpy(text, n):
+    codes = np.frombuffer(to_codes(text), dtype=np.uint8)
+    packed = np.zeros(len(codes) - n + 1, dtype=np.int64)
+    for i in range(n):
+        packed *= 26
+        packed += codes[i:len(codes) - n + 1 + i]
+    counts = np.bincount(packed, minlength=26 ** n)
+    return Counter({unpack(int(number), n): int(counts[number])
+                    for number in np.flatnonzero(counts)})
+
+
+def count_ngrams(text, sizes=SIZES, use_numpy=None):
+    """
+    Count the n-grams of a text, for each n in `sizes`, returning a dict from
+    each n to a Counter of n-grams.
+
+    With NumPy installed, long texts are counted by packing each n-gram into
+    a number (see pack()) over the whole text at once; `use_numpy` forces
+    this on (True) or off (False).
+    """
+    return _count(letters(text), sizes, use_numpy)
+
+
+def _count(text, sizes, use_numpy):
+    # count_ngrams(), for a text that's already just letters
+    if use_numpy is None:
+        use_numpy = len(text) >= _NUMPY_MINIMUM and _numpy() is not None
+    elif use_numpy and _numpy() is None:
+        raise ImportError('Counting with NumPy requires NumPy')
+    count = _count_numpy if use_numpy else _count_python
+    return {n: count(text, n) if len(text) >= n else Counter()
+            for n in sizes}
+
+
+def merge_counts(*counts):
+    """
+    Given any number of results of count_ngrams() (or the functions below),
+    add them together.
+    """
+    merged = {}
+    for result in counts:
+        for n, counter in result.items():
+            merged.setdefault(n, Counter()).update(counter)
+    return merged
+
+
+def _count_piece(args):
+    # Count the n-grams of `piece` that end in it, given the letters just
+    # before it (`context`), so that n-grams spanning the boundary between
+    # two pieces are counted exactly once
+    context, piece, sizes, use_numpy = args
+    text = context + piece
+    counts = {}
+    for n in sizes:
+        start = max(0, len(context) - n + 1)
+        counts[n] = _count(text[start:], (n,), use_numpy)[n]
+    return counts
+
+
+def count_chunks(chunks, sizes=SIZES, processes=None, use_numpy=None):
+    """
+    Count the n-grams of a text that comes in pieces (the lines of a file,
+    say, or blocks of a larger text), as count_ngrams() would count them all
+    joined together.
+
+    With `processes`, the pieces are counted in that many worker processes
+    and the results merged; the pieces are read as they're needed, so they
+    can come from a generator over something too big to hold in memory.
+    """
+    overlap = max(sizes) - 1
+
+    def pieces():
+        context = ''
+        for chunk in chunks:
+            piece = letters(chunk)
+            yield context, piece, sizes, use_numpy
+            context = (context + piece)[-overlap:] if overlap else ''
+
+    merged = {n: Counter() for n in sizes}
+    if not processes:
+        for counts in map(_count_piece, pieces()):
+            for n, counter in counts.items():
+                merged[n].update(counter)
+        return merged
+    with multiprocessing.Pool(processes) as pool:
+        for counts in pool.imap_unordered(_count_piece, pieces()):
+            for n, counter in counts.items():
+                merged[n].update(counter)
+    return merged
+
+
+def count_file(path, sizes=SIZES, processes=None, use_numpy=None,
+               chunk_size=2 ** 20):
+    """
+    Count the n-grams in a text file, reading it `chunk_size` characters at a
+    time (and counting them in `processes` worker processes, if given).
+    """
+    with open(path) as f:
+        chunks = iter(lambda: f.read(chunk_size), '')
+        return count_chunks(chunks, sizes, processes, use_numpy)
+
+
+def frequencies(counter, minimum=0):
+    """
+    Given a Counter of n-grams, return a dict of their frequencies, in the
+    same shape as `data.LETTER_FREQUENCY` and `data.BIGRAM_FREQUENCY`: from
+    each n-gram to the fraction of all n-grams that it is, most frequent
+    first.  N-grams less frequent than `minimum` are left out.
+    """
+    total = sum(counter.values())
+    if not total:
+        return {}
+    return {gram: count / total for gram, count in counter.most_common()
+            if count / total >= minimum}
+
+
+def save_frequencies(table, path):
+    """
+    Save a frequency table (or any dict of n-grams) as JSON.
+    """
+    with open(path, 'w') as f:
+        json.dump(table, f, indent=0)
+
+
+def load_frequencies(path):
+    """
+    Load a frequency table saved by save_frequencies().
+    """
+    with open(path) as f:
+        return json.load(f)
@@ -24,6 +24,18 @@ def test_primes_to_letters():
     assert ana.primes_to_letters(2 * 131071) == 'E'
 
 
+def test_keys_many():
+    words = ['eat', 'Tea', 't e a', 'example', '', 'e' * 9, 'syzygy!']
+    assert ana.letters_to_primes_many(words) == [
+        ana.letters_to_primes(word) for word in words
+    ]
+    assert ana.letters_to_counts_many(iter(words)) == [
+        ana.letters_to_counts(word) for word in words
+    ]
+    assert ana.letters_to_primes_many(words, processes=2, chunksize=3) == (
+        ana.letters_to_primes_many(words))
+
+
 def test_anadict(tmp_path):
     wordlist = tmp_path / 'wordlist.txt'
     wordlist.write_text('one\ntwo\nneo\nsyzygy')
@@ -39,3 +51,198 @@ def test_anadict(tmp_path):
         _ = anadict[three_as_number]
     with pytest.raises(KeyError, match=str(three_as_number)):
         _ = anadict['ether']
+
+    # Same thing, but with the keys computed in worker processes
+    assert ana.Anadict.from_path(wordlist, processes=2) == anadict
+
+
+def test_subanagrams(tmp_path):
+    wordlist = tmp_path / 'wordlist.txt'
+    wordlist.write_text('one\nneo\nnone\neon\ntwo\nto\nton\nnote\ntone\nx')
+
+    anadict = ana.Anadict.from_path(wordlist)
+    assert anadict.subanagrams('tone') == {
+        'ONE', 'NEO', 'EON', 'TO', 'TON', 'NOTE', 'TONE'
+    }
+    # Repeated letters have to be present as many times as they're used
+    assert anadict.subanagrams('noon') == set()
+    assert anadict.subanagrams('nonet') == anadict.subanagrams('tone') | {
+        'NONE'
+    }
+    assert anadict.subanagrams(ana.letters_to_primes('two')) == {'TWO', 'TO'}
+
+    # The keys are exactly those that divide the original number
+    rack = ana.letters_to_primes('antitoxne')
+    keys = anadict.subanagram_keys(rack)
+    assert sorted(keys) == sorted(k for k in anadict if not rack % k)
+
+    # The index is only rebuilt on request
+    anadict[ana.letters_to_primes('toe')] = {'TOE'}
+    assert 'TOE' not in anadict.subanagrams('tone')
+    anadict.reindex()
+    assert 'TOE' in anadict.subanagrams('tone')
+
+
+def test_phrase_anagrams(tmp_path):
+    wordlist = tmp_path / 'wordlist.txt'
+    wordlist.write_text('a\nant\ntan\nat\ndog\ngod\ngo\ndo\nnod\ntag\nn')
+    anadict = ana.Anadict.from_path(wordlist)
+
+    def anagrams(*args, **kwargs):
+        results = list(ana.phrase_anagrams('dog ant', anadict, *args, **kwargs))
+        # No anagram shows up twice (in the same or another order)
+        as_sets = {frozenset(words) for words in results}
+        assert len(as_sets) == len(results)
+        return as_sets
+
+    two_words = {
+        frozenset(x) for x in [('ANT', 'DOG'), ('ANT', 'GOD'), ('TAN', 'DOG'),
+                               ('TAN', 'GOD'), ('TAG', 'NOD')]
+    }
+    three_words = {
+        frozenset(x) for x in [('AT', 'DOG', 'N'), ('AT', 'GOD', 'N'),
+                               ('DO', 'TAG', 'N')]
+    }
+    assert anagrams() == two_words | three_words
+    assert anagrams(max_words=2) == two_words
+    assert anagrams(min_length=3) == two_words
+    assert anagrams(required=['nod']) == {frozenset(['NOD', 'TAG'])}
+    assert anagrams(forbidden=['ant', 'tan', 'tag'], min_length=3) == set()
+    assert anagrams(required=['cat']) == set()
+
+    # A key that's used twice doesn't give its words in both orders
+    wordlist.write_text('to\not\nteeth')
+    repeated = ana.Anadict.from_path(wordlist)
+    results = list(ana.phrase_anagrams('toot', repeated))
+    assert sorted(results) == [('OT', 'OT'), ('OT', 'TO'), ('TO', 'TO')]
+
+    # Required words come first
+    first = next(ana.phrase_anagrams('dog ant', anadict, required=['god']))
+    assert first[0] == 'GOD'
+
+
+def test_mapped_anadict(tmp_path):
+    wordlist = tmp_path / 'wordlist.txt'
+    wordlist.write_text('one\ntwo\nneo\nsyzygy\na\nzzzzzzzzzzzzzzzzzzzzzzzzz')
+    compiled = tmp_path / 'wordlist.anadict'
+    ana.compile_wordlist(wordlist, compiled)
+
+    anadict = ana.Anadict.from_path(wordlist)
+    with ana.MappedAnadict(compiled) as mapped:
+        assert len(mapped) == len(anadict)
+        assert list(mapped) == sorted(anadict)
+        assert dict(mapped) == anadict
+        assert mapped['eon'] == {'ONE', 'NEO'}
+        assert mapped[ana.letters_to_primes('two')] == {'TWO'}
+        assert 'syzygy' in mapped and 'ether' not in mapped
+        with pytest.raises(KeyError, match=str(ana.letters_to_primes('ab'))):
+            _ = mapped['ba']
+        assert mapped.subanagrams('atone') == {'ONE', 'NEO', 'A'}
+
+    not_compiled = tmp_path / 'not_compiled'
+    not_compiled.write_text('this is not an anadict')
+    with pytest.raises(ValueError, match='Not a compiled Anadict'):
+        ana.MappedAnadict(not_compiled)
+
+    # Too short to have a header at all
+    not_compiled.write_text('short')
+    with pytest.raises(ValueError, match='Not a compiled Anadict'):
+        ana.MappedAnadict(not_compiled)
+
+    # Cut off partway through
+    contents = compiled.read_bytes()
+    for length in (20, 24, 40, len(contents) - 3):
+        not_compiled.write_bytes(contents[:length])
+        with pytest.raises(ValueError, match='Not a compiled Anadict'):
+            ana.MappedAnadict(not_compiled)
+
+
+def test_letters_to_counts():
+    # E, T, and A get the first three four-bit fields
+    assert ana.letters_to_counts('eat') == 0x111
+    assert ana.letters_to_counts('tee') == ana.letters_to_counts('e t e')
+    assert ana.letters_to_counts('tee') == 0x12
+    assert ana.counts_to_letters(ana.letters_to_counts('example')) == 'EEALMPX'
+
+    # More than seven of a letter falls back on (negative) prime products
+    assert ana.letters_to_counts('e' * 7) == 7
+    assert ana.letters_to_counts('e' * 8) == -2 ** 8
+    assert ana.letters_to_counts('e' * 17 + 't') == -(2 ** 17 * 3)
+    assert ana.counts_to_letters(ana.letters_to_counts('e' * 9)) == 'E' * 9
+
+
+def test_counts_difference():
+    megaplex = ana.letters_to_counts('megaplex')
+    example = ana.letters_to_counts('example')
+    assert ana.counts_difference(megaplex, example) == (
+        ana.letters_to_counts('g'))
+    assert ana.counts_difference(example, megaplex) is None
+    assert ana.counts_difference(example, ana.letters_to_counts('ee')) == (
+        ana.letters_to_counts('axmpl'))
+    assert ana.counts_difference(example, ana.letters_to_counts('eee')) is None
+
+    # The fallback works on either side
+    many_es = ana.letters_to_counts('e' * 10 + 'xample')
+    assert ana.counts_difference(many_es, example) == -2 ** 9
+    nine_es = ana.letters_to_counts('e' * 9)
+    assert ana.counts_difference(many_es, nine_es) == example
+    assert ana.counts_difference(example, many_es) is None
+
+
+def test_anadict_counts_scheme(tmp_path):
+    wordlist = tmp_path / 'wordlist.txt'
+    wordlist.write_text('one\ntwo\nneo\nsyzygy\ntone\nnote\nto')
+
+    anadict = ana.Anadict.from_path(wordlist, scheme='counts')
+    assert anadict.scheme == 'counts'
+    assert ana.letters_to_counts('one') in anadict
+    assert anadict['eon'] == {'ONE', 'NEO'}
+    assert anadict.subanagrams('tone') == {'ONE', 'NEO', 'TONE', 'NOTE', 'TO'}
+    assert {frozenset(x) for x in ana.phrase_anagrams('to one', anadict)} == {
+        frozenset(x) for x in [('TO', 'ONE'), ('TO', 'NEO')]
+    }
+
+    # Phrase anagrams work on the packed counts themselves, including ones
+    # that fall back on primes for having more than seven of a letter
+    wordlist.write_text('e\ntee\neeeeeeeet\nee\nnote\ntone\nten')
+    by_counts = ana.Anadict.from_path(wordlist, scheme='counts')
+    by_primes = ana.Anadict.from_path(wordlist)
+    for phrase in ('tone eee', 'eeeeeeeee tee tone', 'eeeeeeeet'):
+        assert sorted(map(sorted, ana.phrase_anagrams(phrase, by_counts))) == (
+            sorted(map(sorted, ana.phrase_anagrams(phrase, by_primes))))
+    assert list(ana.phrase_anagrams('eeeeeeeeeet', by_counts,
+                                    max_words=2)) == [('EEEEEEEET', 'EE')]
+    assert list(ana.phrase_anagrams('eeeeeeeeeet', by_counts,
+                                    required=['ee'], max_words=2)) == [
+        ('EE', 'EEEEEEEET')]
+
+    compiled = tmp_path / 'wordlist.anadict'
+    anadict.save(compiled)
+    with ana.MappedAnadict(compiled) as mapped:
+        assert mapped.scheme == 'counts'
+        assert dict(mapped) == anadict
+        assert mapped['eon'] == {'ONE', 'NEO'}
+
+    with pytest.raises(ValueError, match='Unknown scheme'):
+        ana.Anadict.from_path(wordlist, scheme='other')
+
+
+def test_pattern_index(tmp_path):
+    wordlist = tmp_path / 'wordlist.txt'
+    wordlist.write_text('paper\ncaper\ncamel\nhazel\nlatex\nhater\nwater\ncat')
+
+    index = ana.PatternIndex.from_path(wordlist)
+    assert index.match('?A?E?') == [
+        'PAPER', 'CAPER', 'CAMEL', 'HAZEL', 'LATEX', 'HATER', 'WATER'
+    ]
+    assert index.match('?a?er') == ['PAPER', 'CAPER', 'HATER', 'WATER']
+    assert index.match('c.t') == ['CAT']
+    assert index.match('?????') == index.match('?A?E?')
+    assert index.match('?X???') == []
+    assert index.match('?A?E') == []
+    assert index.match('??????') == []
+
+    # The wildcards have to come from the letters given
+    assert index.match('?A?ER', letters='twp') == ['WATER']
+    assert index.match('?A?ER', letters='pptch') == ['PAPER', 'CAPER', 'HATER']
+    assert index.match('?A?E?', letters='') == []
@@ -1,3 +1,5 @@
+from string import ascii_uppercase
+
 import pytest
 
 from puzzle_utils import codes
@@ -64,3 +66,132 @@ def test_playfair():
     assert ciphertext == 'RTKZBMODZBXDNABEKUDMUIXMMOUVIFQM'
     plaintext = playfair.decode(ciphertext)
     assert plaintext == 'IUSTHIDETHEGOLDINTHETREXESTUMPSX'
+    assert playfair.square == 'PLAYFIREXMBCDGHKNOQSTUVWZ'
+
+    # Chunks are translated as they come, with a letter carried over (and
+    # doubled letters caught) across the boundaries, and the padding for a
+    # final odd letter at the end
+    chunks = ['Just hide the', ' gold in the t', 'ree stumps.']
+    pieces = list(playfair.encode_chunks(iter(chunks)))
+    assert pieces == ['RTKZBMODZB', 'XDNABEKUDM', 'UIXMMOUVIF', 'QM']
+    assert ''.join(playfair.decode_chunks(pieces)) == plaintext
+    assert list(playfair.encode_chunks(['x', 'x'])) == ['', 'GW', 'GW']
+
+
+PANGRAM = 'The quick brown fox jumps over the lazy dog, again and again.'
+
+
+def test_caesar_crack():
+    caesar = codes.Caesar()
+    ciphertext = caesar.encode(PANGRAM, 11)
+    ranked = caesar.crack(ciphertext)
+    assert len(ranked) == 26
+    score, distance, plaintext = ranked[0]
+    assert (distance, plaintext) == (11, PANGRAM)
+    assert [x[0] for x in ranked] == sorted([x[0] for x in ranked],
+                                            reverse=True)
+    assert caesar.crack(SAMPLE_TEXT)[0][1:] == (0, SAMPLE_TEXT)
+
+
+def test_affine():
+    affine = codes.Affine()
+    assert affine.encode('abc XYZ', 1, 3) == codes.Caesar().encode(
+        'abc XYZ', 3)
+    assert affine.encode(SAMPLE_TEXT, 25, 25) == codes.Atbash().encode(
+        SAMPLE_TEXT)
+    assert affine.encode('affine', 5, 8) == 'ihhwvc'
+    assert affine.decode(affine.encode(SAMPLE_TEXT, 7, 2), 7, 2) == SAMPLE_TEXT
+    with pytest.raises(ValueError, match='Not coprime with 26: 13'):
+        affine.encode(SAMPLE_TEXT, 13, 0)
+
+    ranked = affine.crack(affine.encode(PANGRAM, 7, 2))
+    assert len(ranked) == 12 * 26
+    assert ranked[0][1:] == ((7, 2), PANGRAM)
+
+
+LONG_TEXT = """
+It was the best of times, it was the worst of times, it was the age of
+wisdom, it was the age of foolishness, it was the epoch of belief, it was the
+epoch of incredulity, it was the season of Light, it was the season of
+Darkness, it was the spring of hope, it was the winter of despair, we had
+everything before us, we had nothing before us, we were all going direct to
+Heaven, we were all going direct the other way.
+"""
+
+
+def test_vigenere():
+    vigenere = codes.Vigenere('lemon')
+    assert vigenere.keyword == 'LEMON'
+    assert vigenere.encode('Attack at dawn!') == 'Lxfopv ef rnhr!'
+    assert vigenere.decode('Lxfopv ef rnhr!') == 'Attack at dawn!'
+    assert vigenere.decode(vigenere.encode(LONG_TEXT)) == LONG_TEXT
+    assert codes.Vigenere('b').encode(SAMPLE_TEXT) == (
+        codes.Caesar().encode(SAMPLE_TEXT, 1))
+    with pytest.raises(ValueError, match='no letters'):
+        codes.Vigenere('123')
+
+
+def test_vigenere_crack():
+    for keyword in ['lemon', 'dickens', 'q']:
+        ciphertext = codes.Vigenere(keyword).encode(LONG_TEXT)
+        score, found, plaintext = codes.Vigenere.crack(ciphertext)[0]
+        assert found == keyword.upper()
+        assert plaintext == LONG_TEXT
+    assert codes.Vigenere.crack('') == []
+
+
+PROSE = """
+When the expedition finally reached the northern shore of the lake, the
+weather had already begun to turn against them.  A cold wind came down from
+the mountains every evening, and the guides insisted that the party make camp
+well before sunset so that the fires could be lit while there was still light
+enough to gather wood.  Nobody complained about the early stops, because the
+days were long and the walking was harder than anyone had expected.  The maps
+they had brought from the city were old and often wrong, showing bridges
+where there were only fallen trees and villages where there was nothing but
+grass.
+"""
+
+
+def test_substitution():
+    substitution = codes.Substitution()
+    key = 'QWERTYUIOPASDFGHJKLZXCVBNM'
+    assert substitution.encode(SAMPLE_TEXT, key) == 'Ziol ol qf tbqdhst.'
+    assert substitution.decode('Ziol ol qf tbqdhst.', key) == SAMPLE_TEXT
+    assert substitution.encode(SAMPLE_TEXT, ascii_uppercase) == SAMPLE_TEXT
+    with pytest.raises(ValueError, match='Not a permutation'):
+        substitution.encode(SAMPLE_TEXT, 'ABC')
+
+    ciphertext = substitution.encode(PROSE, key)
+    results = substitution.crack(ciphertext, restarts=2, seed=1)
+    assert len(results) == 2
+    score, found, plaintext = results[0]
+    assert plaintext == substitution.decode(ciphertext, found)
+    # Bigram statistics confuse a few of the rarer letters, but the result is
+    # readable
+    right = sum(a == b for a, b in zip(plaintext, PROSE))
+    assert right > .8 * len(PROSE)
+
+    # The same seed gives the same searches, wherever they're run
+    assert substitution.crack(ciphertext, restarts=2, iterations=1000,
+                              seed=2, processes=2) == (
+        substitution.crack(ciphertext, restarts=2, iterations=1000, seed=2))
+    assert substitution.crack('...') == []
+    # Letters outside A-Z are skipped, like punctuation
+    assert len(substitution.crack('café au lait ' * 40, restarts=1,
+                                  iterations=100)) == 1
+
+
+def test_playfair_crack():
+    # A real search takes a few hundred thousand iterations for a text this
+    # size, which is too slow to test here
+    ciphertext = codes.Playfair('expedition').encode(PROSE)
+    results = codes.Playfair.crack(ciphertext, restarts=2, iterations=2000,
+                                   seconds=10, seed=1)
+    assert [score for score, _, _ in results] == sorted(
+        (score for score, _, _ in results), reverse=True)
+    for score, square, plaintext in results:
+        assert sorted(square) == sorted(ascii_uppercase.replace('J', ''))
+        assert plaintext == codes.Playfair(square).decode(ciphertext)
+    assert len(codes.Playfair.crack('café au lait ' * 40, restarts=1,
+                                    iterations=100)) == 1
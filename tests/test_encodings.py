@@ -1,3 +1,6 @@
+import pytest
+
+from puzzle_utils import data
 from puzzle_utils import encodings as enc
 
 
@@ -27,3 +30,36 @@ def test_semaphore():
 def test_scrabble():
     assert enc.scrabble('QI') == 11
     assert enc.scrabble('all tiles are one!') == 14
+
+
+def test_morse_readings():
+    assert sorted(enc.morse_readings('...')) == ['EEE', 'EI', 'IE', 'S']
+    assert enc.count_morse_readings('...') == 4
+    assert enc.count_morse_readings('') == 1
+
+    # Far too many readings to list, but they can still be counted
+    message = '.-' * 60
+    assert enc.count_morse_readings(message) > 10 ** 30
+    assert next(enc.morse_readings(message)) == 'ET' * 60
+    # However long the message is
+    assert next(enc.morse_readings('.' * 5000)) == 'E' * 5000
+
+    with pytest.raises(ValueError):
+        enc.count_morse_readings('.-/.-')
+
+
+def test_unspaced_morse():
+    message = '...---...'
+    assert enc.unspaced_morse(message)[0] == 'SOS'
+    assert len(enc.unspaced_morse(message, results=5)) == 5
+    assert enc.unspaced_morse(message, results=0) == []
+
+    words = ['the', 'quick', 'brown', 'fox', 'jumps', 'over', 'lazy', 'dog',
+             'a', 'i', 'in', 'it', 'to', 'into', 'he', 'at']
+    message = ''.join(data.LETTER_TO_MORSE[letter]
+                      for letter in 'THEQUICKBROWNFOXJUMPSOVERTHELAZYDOG')
+    assert len(message) > 100
+    decoded = enc.unspaced_morse(message, words=words, results=3)
+    assert decoded[0] == 'THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG'
+    assert len(decoded) == 3
+    assert enc.unspaced_morse('.-.-.-', words=['dog']) == []
@@ -0,0 +1,81 @@
+import math
+
+import pytest
+
+from puzzle_utils import codes
+from puzzle_utils import data
+from puzzle_utils import fitness
+from puzzle_utils import ngrams
+
+ENGLISH = 'The quick brown fox jumps over the lazy dog.'
+GIBBERISH = 'Qzx vjkwq pmfgz xqb kvjzq wxfq pmz qjvx zkw.'
+
+
+def test_english():
+    scorer = fitness.ENGLISH
+    assert scorer.n == 2
+    assert len(scorer.log_probs) == 26 * 26
+    assert scorer.score(ENGLISH) > scorer.score(GIBBERISH)
+    # Same as adding up the bigrams by hand
+    letters = ngrams.letters(ENGLISH)
+    total = sum(fitness.english_bigram_frequencies().values())
+    assert scorer.score(ENGLISH) == pytest.approx(sum(
+        math.log(fitness.english_bigram_frequencies()[a + b] / total)
+        for a, b in zip(letters, letters[1:])
+    ))
+    assert scorer.score('The') == scorer.score_codes(bytes([19, 7, 4]))
+    assert scorer.score('') == scorer.score('a') == 0
+
+    # The cracking code agrees about which plaintexts are better
+    caesar = codes.Caesar()
+    shifts = caesar.show_all(caesar.encode(ENGLISH, 3))
+    assert max(shifts, key=scorer.score) == ENGLISH
+
+
+def test_from_counts(tmp_path):
+    counts = ngrams.count_ngrams(ENGLISH * 10, sizes=(3,))[3]
+    scorer = fitness.NgramScorer.from_counts(counts)
+    assert scorer.n == 3
+    the = math.log(counts['THE'] / sum(counts.values()))
+    assert scorer.score('the') == pytest.approx(the)
+    assert scorer.score('zzz') == scorer.floor
+    assert scorer.floor < min(scorer.log_probs[ngrams.pack(g)] for g in counts)
+
+    path = tmp_path / 'trigrams.json'
+    ngrams.save_frequencies(ngrams.frequencies(counts), path)
+    loaded = fitness.NgramScorer.from_path(path, floor=-20)
+    assert loaded.score('the') == pytest.approx(the)
+    assert loaded.score('zzz') == -20
+
+    # Each letter's probability given the ones before it; for each k, they
+    # add up to 1 over the possible last letters
+    conditional = scorer.conditional_log_probs()
+    assert conditional is scorer.conditional_log_probs()
+    assert [len(x) for x in conditional] == [0, 26, 26 ** 2, 26 ** 3]
+    assert sum(map(math.exp, conditional[3][:26])) == pytest.approx(1)
+    assert conditional[3][ngrams.pack('THE')] > (
+        conditional[3][ngrams.pack('THZ')])
+
+    with pytest.raises(ValueError, match='different lengths'):
+        fitness.NgramScorer({'AB': 1, 'ABC': 1})
+    assert fitness.NgramScorer(data.LETTER_FREQUENCY).score('e') == (
+        pytest.approx(math.log(data.LETTER_FREQUENCY['E'] /
+                               sum(data.LETTER_FREQUENCY.values()))))
+
+
+def test_score_many(monkeypatch):
+    texts = [ENGLISH, GIBBERISH, '', 'a', 'ab', ENGLISH * 3]
+    expected = [fitness.ENGLISH.score(text, use_numpy=False) for text in texts]
+    assert fitness.ENGLISH.score_many(texts, use_numpy=False) == expected
+    assert fitness.ENGLISH.score_many([]) == []
+
+    if fitness._numpy() is not None:
+        assert fitness.ENGLISH.score_many(texts, use_numpy=True) == (
+            pytest.approx(expected))
+        assert fitness.ENGLISH.score(ENGLISH, use_numpy=True) == (
+            pytest.approx(expected[0]))
+
+    monkeypatch.setattr(fitness, 'np', None)
+    assert fitness.ENGLISH.score_many(texts) == expected
+    with pytest.raises(ImportError, match='requires NumPy'):
+        fitness.ENGLISH.score_many(texts, use_numpy=True)
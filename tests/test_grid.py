@@ -33,6 +33,8 @@ def test_grid_class():
     from_dims = grid.Grid.from_dimensions(3, 2, default='.')
     from_dims[(1, 1)] = '*'
     assert from_dims.to_text() == '..\n.*\n..'
+    empty = grid.Grid.from_dimensions(0, 0)
+    assert (empty.rows, empty.columns) == (0, 0)
 
 
 def test_grid_from_text():
@@ -75,3 +77,315 @@ def test_grid_retrieval_methods():
     assert standard.get_line((1, 1), grid.SOUTHEAST, 4, past_edge='#') == [
         'G', 'M', 'S', '#'
     ]
+
+
+def test_find_words():
+    standard = grid.Grid.from_text(SAMPLE_GRID)
+    found = standard.find_words(['GMS', 'ABC', 'CBA', 'OJE', 'NOT', 'AFKPQ'])
+    assert sorted(found) == [
+        ('ABC', (0, 0), grid.EAST),
+        ('CBA', (0, 2), grid.WEST),
+        ('GMS', (1, 1), grid.SOUTHEAST),
+        ('OJE', (2, 4), grid.NORTH),
+    ]
+
+    # Words that are prefixes of each other are all found; a one-letter word
+    # is found just once, with no direction
+    found = standard.find_words(['H', 'HM', 'HMR', 'HMRX'])
+    assert found == [
+        ('H', (1, 2), None),
+        ('HM', (1, 2), grid.SOUTH),
+        ('HMR', (1, 2), grid.SOUTH),
+    ]
+
+    assert standard.find_words(['ABC'], directions=[grid.WEST]) == []
+
+    # Cells don't have to be single letters
+    wide = grid.Grid.from_text('AB CD\nEF GH', sep=' ')
+    assert wide.find_words(['ABCD', 'ABEF', 'ABGH', 'CDEF']) == [
+        ('ABCD', (0, 0), grid.EAST), ('ABGH', (0, 0), grid.SOUTHEAST),
+        ('ABEF', (0, 0), grid.SOUTH), ('CDEF', (0, 1), grid.SOUTHWEST)
+    ]
+
+
+def test_find_paths():
+    standard = grid.Grid.from_text(SAMPLE_GRID)
+    words = ['ABCD', 'AGMS', 'FGHC', 'ABA', 'MIDGE', 'BAG', 'NOTE', 'LMNO']
+    found = standard.find_paths(words)
+    assert found == {
+        'ABCD': ((0, 0), (0, 1), (0, 2), (0, 3)),
+        'AGMS': ((0, 0), (1, 1), (2, 2), (3, 3)),
+        'FGHC': ((1, 0), (1, 1), (1, 2), (0, 2)),
+        'BAG': ((0, 1), (0, 0), (1, 1)),
+        'LMNO': ((2, 1), (2, 2), (2, 3), (2, 4)),
+    }
+    # No cell can be used twice (so no ABA), and paths have to be contiguous
+    # (so no MIDGE or NOTE)
+
+    assert set(standard.find_paths(words, diagonals=False)) == {
+        'ABCD', 'FGHC', 'LMNO'
+    }
+    assert standard.find_paths(words, processes=2) == found
+
+
+def test_compact_grid():
+    standard = grid.Grid.from_text(SAMPLE_GRID)
+    compact = grid.CompactGrid.from_text(SAMPLE_GRID)
+    assert compact == standard.to_compact()
+    assert compact.to_grid() == standard
+    assert (compact.rows, compact.columns, len(compact)) == (4, 5, 20)
+    assert list(compact) == list(standard)
+    assert compact.to_text() == SAMPLE_GRID
+    assert compact.to_text(sep='|') == standard.to_text(sep='|')
+
+    # Same retrieval methods, same results
+    for r in range(standard.rows):
+        assert compact.get_row(r) == standard.get_row(r)
+    for c in range(standard.columns):
+        assert compact.get_column(c) == standard.get_column(c)
+    for coord in standard:
+        assert compact[coord] == standard[coord]
+        for diagonals in (False, True):
+            assert (compact.get_neighbors(coord, diagonals)
+                    == standard.get_neighbors(coord, diagonals))
+    assert compact.get_line((1, 1), grid.SOUTHEAST, 4) is None
+    assert compact.get_line((1, 1), grid.SOUTHEAST, 4, past_edge='#') == [
+        'G', 'M', 'S', '#'
+    ]
+    assert compact.find_words(['GMS']) == standard.find_words(['GMS'])
+    assert compact.find_paths(['BAG']) == standard.find_paths(['BAG'])
+
+    # Errors are standard exceptions
+    with pytest.raises(KeyError):
+        compact.get_row(6)
+    with pytest.raises(KeyError):
+        compact[(0, -1)]
+    assert compact.get((0, -1), '#') == '#'
+    with pytest.raises(ValueError, match='same length'):
+        grid.CompactGrid.from_text('ABC\nDE')
+
+    from_dims = grid.CompactGrid.from_dimensions(3, 2, default='.')
+    from_dims[(1, 1)] = '*'
+    assert from_dims.to_text() == '..\n.*\n..'
+    well_split = grid.CompactGrid.from_text('A B\nC D', sep=' ')
+    assert well_split[(1, 1)] == 'D'
+
+
+MAZE = """
+S..#....
+.#.#.##.
+.#...#..
+.####.#.
+......#G
+""".strip()
+
+
+def test_bfs_and_flood_fill():
+    maze = grid.Grid.from_text(MAZE)
+    not_wall = lambda x: x != '#'
+
+    distances = maze.bfs((0, 0), passable=not_wall)
+    assert distances[(0, 0)] == 0
+    assert distances[(0, 2)] == 2
+    assert distances[(4, 7)] == 15
+    assert (0, 3) not in distances
+    # Diagonal steps can cut corners
+    assert maze.bfs((0, 0), passable=not_wall, diagonals=True)[(4, 7)] == 8
+
+    everything = maze.bfs((0, 0))
+    assert len(everything) == 40
+    assert everything[(4, 7)] == 11
+
+    assert maze.flood_fill((0, 0), passable=not_wall) == set(distances)
+    walls = maze.flood_fill((1, 1), passable=lambda x: x == '#')
+    assert walls == {(1, 1), (2, 1), (3, 1), (3, 2), (3, 3), (3, 4)}
+
+    components = maze.connected_components(passable=lambda x: x == '#')
+    assert len(components) == 4
+    assert walls in components
+    assert {(3, 6), (4, 6)} in components
+    assert len(maze.connected_components(lambda x: x == '#', True)) == 2
+    assert maze.connected_components() == [set(maze)]
+
+    # Nothing is reachable from a cell that can't be entered
+    small = grid.Grid.from_text('#.\n..')
+    assert small.flood_fill((0, 0), passable=not_wall) == set()
+    assert small.bfs((0, 0), passable=not_wall) == {}
+    assert len(small.flood_fill((1, 1), passable=not_wall)) == 3
+
+
+def test_shortest_path():
+    maze = grid.Grid.from_text(MAZE)
+    not_wall = lambda x: x != '#'
+
+    path = maze.shortest_path((0, 0), (4, 7), passable=not_wall)
+    assert len(path) == 16
+    assert path[0] == (0, 0) and path[-1] == (4, 7)
+    for a, b in itertools.pairwise(path):
+        assert abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1
+        assert maze[b] != '#'
+    assert maze.shortest_path((0, 0), (0, 0)) == [(0, 0)]
+    assert maze.shortest_path((0, 0), (0, 3), passable=not_wall) is None
+
+    # Make open floor expensive, so it's cheaper to go through walls (which
+    # means the A* heuristic has to scale down to the cheapest cell)
+    cost = {'.': 10, '#': 1, 'S': 1, 'G': 1}.get
+    path = maze.shortest_path((0, 0), (4, 7), cost=cost)
+    assert sum(cost(maze[coord]) for coord in path[1:]) == (
+        maze.dijkstra((0, 0), cost)[(4, 7)])
+    assert maze.dijkstra((0, 0), cost)[(4, 7)] == 29
+    assert maze.dijkstra((0, 0), cost, diagonals=True)[(4, 7)] == 8
+
+    compact = maze.to_compact()
+    assert compact.bfs((0, 0), not_wall) == maze.bfs((0, 0), not_wall)
+    assert compact.shortest_path((0, 0), (4, 7), not_wall) == (
+        maze.shortest_path((0, 0), (4, 7), not_wall))
+
+    # Costs are only needed for cells that can be entered
+    weighted = grid.Grid.from_text('1#1\n1#1\n191')
+    assert weighted.dijkstra((0, 0), cost=int, passable=not_wall) == {
+        (0, 0): 0, (1, 0): 1, (2, 0): 2, (2, 1): 11, (2, 2): 12, (1, 2): 13,
+        (0, 2): 14}
+    assert weighted.shortest_path((0, 0), (0, 2), not_wall, cost=int) == [
+        (0, 0), (1, 0), (2, 0), (2, 1), (2, 2), (1, 2), (0, 2)]
+    assert weighted.shortest_path((0, 1), (0, 2), not_wall, cost=int) is None
+    assert weighted.dijkstra((0, 1), cost=int, passable=not_wall) == {}
+
+    with pytest.raises(KeyError):
+        maze.bfs((5, 0))
+
+
+def test_array_grid():
+    pytest.importorskip('numpy')
+    standard = grid.Grid.from_text(SAMPLE_GRID)
+    array = standard.to_array()
+    assert (array.rows, array.columns) == (4, 5)
+    assert array.to_grid() == standard
+    assert array.to_text() == SAMPLE_GRID
+    assert grid.ArrayGrid.from_text(SAMPLE_GRID).to_text() == SAMPLE_GRID
+    assert standard.to_compact().to_array().to_text() == SAMPLE_GRID
+    assert array[(1, 2)] == 'H'
+
+    assert list(array.get_row(2)) == standard.get_row(2)
+    assert list(array.get_column(2)) == standard.get_column(2)
+    assert [''.join(x) for x in array.get_rows()] == SAMPLE_GRID.splitlines()
+    assert [''.join(x) for x in array.get_columns()] == [
+        'AFKP', 'BGLQ', 'CHMR', 'DINS', 'EJOT'
+    ]
+    assert [''.join(x) for x in array.get_diagonals()] == [
+        'P', 'KQ', 'FLR', 'AGMS', 'BHNT', 'CIO', 'DJ', 'E'
+    ]
+    assert [''.join(x) for x in array.get_antidiagonals()] == [
+        'A', 'BF', 'CGK', 'DHLP', 'EIMQ', 'JNR', 'OS', 'T'
+    ]
+
+    assert array.rotate().to_text() == 'PKFA\nQLGB\nRMHC\nSNID\nTOJE'
+    assert array.rotate(4).to_text() == SAMPLE_GRID
+    assert array.transpose().to_text() == 'AFKP\nBGLQ\nCHMR\nDINS\nEJOT'
+
+    windows = array.get_windows(2, 3)
+    assert windows.shape == (3, 3, 2, 3)
+    assert windows[1, 2].tolist() == [['H', 'I', 'J'], ['M', 'N', 'O']]
+
+    # Views, not copies
+    array[(0, 0)] = 'Z'
+    assert array.get_row(0)[0] == 'Z'
+    assert array.get_diagonals()[3][0] == 'Z'
+    assert array.transpose()[(0, 0)] == 'Z'
+
+    # Cells have a fixed width, which can be made wider than the contents
+    with pytest.raises(ValueError, match='too wide'):
+        array[(0, 0)] = 'XY'
+    assert array[(0, 0)] == 'Z'
+    wide = standard.to_array(dtype='U2')
+    wide[(0, 0)] = 'XY'
+    assert wide.to_grid()[(0, 0)] == 'XY'
+    assert grid.ArrayGrid.from_text('AB CD', sep=' ')[(0, 1)] == 'CD'
+
+
+def test_array_grid_without_numpy(monkeypatch):
+    monkeypatch.setattr(grid, 'np', None)
+    with pytest.raises(ImportError, match='NumPy'):
+        grid.Grid.from_text(SAMPLE_GRID).to_array()
+
+
+def test_grid_from_file(tmp_path):
+    path = tmp_path / 'grid.txt'
+    path.write_text(SAMPLE_GRID + '\n')
+
+    standard = grid.Grid.from_text(SAMPLE_GRID)
+    from_file = grid.Grid.from_file(path)
+    assert from_file == standard
+    assert (from_file.rows, from_file.columns) == (4, 5)
+    assert grid.CompactGrid.from_file(path) == standard.to_compact()
+
+    # A blank line at the end is ignored by both, but not one in the middle
+    path.write_text(SAMPLE_GRID + '\n\n')
+    assert grid.Grid.from_file(path) == standard
+    assert grid.CompactGrid.from_file(path) == standard.to_compact()
+    with pytest.raises(ValueError):
+        grid.CompactGrid.from_lines(['AB', '', 'CD'])
+    # Lines can come from any iterable, with or without line endings
+    lines = iter(['A|B\r\n', 'C|D\n'])
+    split = grid.Grid.from_lines(lines, sep='|')
+    assert split.to_text() == 'AB\nCD'
+    assert grid.CompactGrid.from_lines(['AB', 'CD']) == split.to_compact()
+
+    # Dimensions are the same as if they'd been computed from the keys
+    ragged = grid.Grid.from_lines(['ABC', 'D', ''])
+    assert (ragged.rows, ragged.columns) == (2, 1)
+    assert grid.Grid(ragged) == ragged
+    assert (grid.Grid(ragged).rows, grid.Grid(ragged).columns) == (2, 1)
+
+
+def life(cell, neighbors):
+    alive = neighbors.count('#')
+    if alive == 3 or (alive == 2 and cell == '#'):
+        return '#'
+    return '.'
+
+
+def test_automaton():
+    blinker = grid.Grid.from_text('.....\n..#..\n..#..\n..#..\n.....')
+    automaton = grid.Automaton(blinker, life)
+    assert automaton.step() == 4
+    assert automaton.to_grid().to_text() == '.....\n.....\n.###.\n.....\n.....'
+    assert automaton.period is None
+    automaton.step()
+    assert automaton.to_grid() == blinker
+    assert automaton.period == 2
+    assert automaton.generation == 2
+
+    # Skipping ahead gives the same result as stepping
+    automaton.run(1001)
+    assert automaton.generation == 1003
+    stepped = grid.Automaton(blinker, life)
+    for _ in range(1003):
+        stepped.step()
+    assert automaton.to_compact() == stepped.to_compact()
+
+    # A glider, which (on a finite grid) eventually turns into a block
+    glider = grid.Grid.from_text(
+        '.#......\n..#.....\n###.....\n........\n'
+        '........\n........\n........\n........'
+    )
+    automaton = grid.Automaton(glider, life)
+    automaton.run(4)
+    assert automaton.to_grid().to_text().splitlines()[1:4] == [
+        '..#.....', '...#....', '.###....'
+    ]
+    automaton.run(100)
+    assert automaton.period == 1
+    assert automaton.step() == 0
+    assert automaton.to_grid().to_text().splitlines()[-2:] == [
+        '......##', '......##'
+    ]
+
+    # Without diagonals, the neighbors are just the orthogonal ones
+    spread = grid.Automaton(
+        grid.Grid.from_text('...\n.#.\n...'),
+        lambda cell, neighbors: '#' if '#' in neighbors + [cell] else cell,
+        diagonals=False
+    )
+    assert spread.run(1).to_grid().to_text() == '.#.\n###\n.#.'
+    assert spread.run(1).to_grid().to_text() == '###\n###\n###'
@@ -0,0 +1,79 @@
+from collections import Counter
+
+import pytest
+
+from puzzle_utils import data
+from puzzle_utils import ngrams
+
+TEXT = 'Of the people, by the people, for the people.'
+
+
+def test_count_ngrams():
+    counts = ngrams.count_ngrams(TEXT)
+    assert sorted(counts) == [1, 2, 3, 4]
+    assert counts[1]['E'] == 9
+    # Bigrams bridge words
+    assert counts[2]['FT'] == 1
+    assert counts[2]['TH'] == 3
+    assert counts[3]['PEO'] == 3
+    assert counts[4]['THEP'] == 3
+    for n in range(1, 5):
+        assert sum(counts[n].values()) == len(ngrams.letters(TEXT)) - n + 1
+
+    assert ngrams.count_ngrams('a b', sizes=(2, 3)) == {
+        2: {'AB': 1}, 3: {}
+    }
+    assert ngrams.pack('BA') == 26
+    assert ngrams.unpack(ngrams.pack('QUIZ'), 4) == 'QUIZ'
+    assert ngrams.unpack(0, 3) == 'AAA'
+
+
+def test_count_ngrams_numpy():
+    pytest.importorskip('numpy')
+    text = TEXT * 100
+    assert ngrams.count_ngrams(text, use_numpy=True) == (
+        ngrams.count_ngrams(text, use_numpy=False))
+
+
+def test_count_ngrams_without_numpy(monkeypatch):
+    monkeypatch.setattr(ngrams, 'np', None)
+    assert ngrams.count_ngrams(TEXT * 1000)[2]['TH'] == 3000
+    with pytest.raises(ImportError, match='requires NumPy'):
+        ngrams.count_ngrams(TEXT, use_numpy=True)
+
+
+def test_count_chunks(tmp_path):
+    expected = ngrams.count_ngrams(TEXT)
+    # Split anywhere, even in the middle of words, with nothing in between
+    chunks = ['Of the peo', 'p', '', 'le, by the p', 'eople, for the people.']
+    assert ngrams.count_chunks(iter(chunks)) == expected
+    assert ngrams.count_chunks(chunks, processes=2) == expected
+    assert ngrams.count_chunks(chunks, sizes=(1,)) == {1: expected[1]}
+
+    path = tmp_path / 'text.txt'
+    path.write_text(TEXT)
+    assert ngrams.count_file(path, chunk_size=7) == expected
+
+    # Merging separate counts misses the n-grams across the split ("by th|e")
+    halves = [ngrams.count_ngrams(TEXT[:20]), ngrams.count_ngrams(TEXT[20:])]
+    merged = ngrams.merge_counts(*halves)
+    assert merged[1] == expected[1]
+    assert merged[2] + Counter({'HE': 1}) == expected[2]
+
+
+def test_frequencies(tmp_path):
+    counts = ngrams.count_ngrams(TEXT, sizes=(1,))[1]
+    table = ngrams.frequencies(counts)
+    assert list(table)[0] == 'E'
+    assert sum(table.values()) == pytest.approx(1)
+    assert set(table) <= set(data.LETTER_FREQUENCY)
+    assert ngrams.frequencies(counts, minimum=.1) == {
+        gram: freq for gram, freq in table.items() if freq >= .1
+    }
+    assert ngrams.frequencies({}) == {}
+
+    path = tmp_path / 'table.json'
+    ngrams.save_frequencies(table, path)
+    loaded = ngrams.load_frequencies(path)
+    assert loaded == table
+    assert list(loaded) == list(table)
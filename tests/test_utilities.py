@@ -76,18 +76,107 @@ def test_binarize():
         util.binarize(123, 37)
 
 
+def test_big_binarize():
+    # Big numbers are split in half before converting; the halves have to be
+    # padded with the right number of zeros
+    number = 7 ** 5000 + 7 ** 1234
+    as_base_7 = util.binarize(number, 7)
+    assert as_base_7 == '1' + '0' * 3765 + '1' + '0' * 1234
+    assert util.unbinarize(as_base_7, 7) == number
+
+    # Even where int() and str() refuse to convert (over 4300 digits)
+    number = 3 ** 20000
+    assert util.binarize(number, 2) == bin(number)[2:]
+    assert util.unbinarize(util.binarize(number, 10), 10) == number
+    assert util.unbinarize(util.binarize(number, 36), 36) == number
+
+
+def test_binarize_many():
+    numbers = [random.randint(0, 10 ** 15) for _ in range(500)]
+    numbers += [0, 1, -32, 32.8, 2 ** 64 - 1]
+    for base in (2, 7, 10, 16, 36):
+        as_strings = util.binarize_many(numbers, base)
+        assert as_strings == [util.binarize(n, base) for n in numbers]
+        assert util.unbinarize_many(as_strings, base) == [
+            int(abs(n)) for n in numbers]
+
+    # Too big for NumPy
+    assert util.binarize_many([2 ** 64] * 200, 3) == [
+        util.binarize(2 ** 64, 3)] * 200
+    assert util.binarize_many([], 5) == []
+
+    with pytest.raises(ValueError, match='Invalid base'):
+        util.binarize_many([123], 37)
+
+    with pytest.raises(ValueError, match='Invalid base'):
+        util.unbinarize('123', 1)
+
+
 def test_primefactor():
     assert util.primefactor(32) == [2, 2, 2, 2, 2]
     assert util.primefactor(60) == [2, 2, 3, 5]
     assert util.primefactor(1337) == [7, 191]
     assert util.primefactor(13337) == [13337]
 
+    # Whole numbers can be floats; other numbers can't
+    assert util.primefactor(12.0) == [2, 2, 3]
+    with pytest.raises(ValueError, match='Not an integer'):
+        util.primefactor(12.5)
+
 
 def test_isprime():
     assert util.isprime(2) is True
     assert util.isprime(4) is False
     assert util.isprime(1337) is False
     assert util.isprime(13337) is True
+    assert util.isprime(7.0) is True
+    assert util.isprime_many([7.0, 8.0]) == [True, False]
+    with pytest.raises(ValueError, match='Not an integer'):
+        util.isprime(7.5)
+
+
+def test_primes_up_to():
+    assert util.primes_up_to(30) == [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+    assert util.primes_up_to(29)[-1] == 29
+    assert util.primes_up_to(1) == []
+    assert len(util.primes_up_to(10 ** 6)) == 78498
+    assert util.isprime_many([0, 1, 2, 9, 13337, 999983]) == [
+        False, False, True, False, True, True
+    ]
+
+
+def test_sieve_limit():
+    # Past the table's limit, the answers are the same, just slower
+    expected = util.primes_up_to(20000)
+    factors = {n: util.primefactor(n) for n in [1, 2, 97 * 89, 2 ** 20,
+                                                 9973 ** 2, 3 * 9973 * 9967]}
+    try:
+        util.set_sieve_limit(100)
+        assert util.primes_up_to(20000) == expected
+        assert {n: util.primefactor(n) for n in factors} == factors
+        assert [util.isprime(n) for n in expected[-5:]] == [True] * 5
+        assert util.isprime(9973 ** 2) is False
+    finally:
+        util.set_sieve_limit(util.SIEVE_LIMIT)
+
+
+def test_large_numbers():
+    # Well past the sieve, and far too big for trial division
+    assert util.primefactor(1000000007 * 998244353) == [998244353, 1000000007]
+    assert util.primefactor((2 ** 61 - 1) * (2 ** 31 - 1)) == [
+        2 ** 31 - 1, 2 ** 61 - 1
+    ]
+    assert util.primefactor(1000003 ** 5 * 12) == [2, 2, 3] + [1000003] * 5
+    assert util.primefactor(10 ** 18 + 9) == [10 ** 18 + 9]
+    assert util.isprime(2 ** 127 - 1) is True
+    assert util.isprime(2 ** 67 - 1) is False
+    # A Carmichael number, and the first composite that fools Miller-Rabin
+    # with every prime below 42 as a base
+    assert util.isprime(41041) is False
+    assert util.primefactor(3317044064679887385961981) == [
+        1287836182261, 2575672364521
+    ]
+    assert util.isprime(3317044064679887385961981) is False
 
 
 def test_factor():
@@ -96,6 +185,33 @@ def test_factor():
     assert util.factor(1337) == [1, 7, 191, 1337]
 
 
+def test_divisors():
+    assert util.factorization(5551212) == {2: 2, 3: 1, 73: 1, 6337: 1}
+    assert util.factorization(1) == {}
+    with pytest.raises(ValueError, match='Not a positive integer'):
+        util.factorization(0)
+
+    assert list(util.divisors(20)) == util.factor(20)
+    assert list(util.divisors(1)) == [1]
+    assert list(util.divisors(720720, low=100, high=120)) == [
+        104, 105, 110, 112, 117, 120
+    ]
+    # Lazily: taking the first few doesn't find the rest
+    first = util.divisors(2 ** 200 * 3 ** 200)
+    assert [next(first) for _ in range(6)] == [1, 2, 3, 4, 6, 8]
+
+    assert util.divisor_count(720720) == len(util.factor(720720)) == 240
+    assert util.divisor_sum(28) == 56
+    assert util.divisor_sum(10, power=2) == 1 + 4 + 25 + 100
+    assert util.divisor_sum(10, power=0) == 4
+    assert util.divisor_count(2 ** 200 * 3 ** 200) == 201 ** 2
+
+    # One factorization can be reused for all of them
+    factors = util.factorization(720720)
+    assert util.factor(720720, factors) == list(util.divisors(
+        720720, factors=factors))
+
+
 def test_decimate():
     assert util.decimate(3, 6) == [[5], []]  # .5
     assert util.decimate(2, 3) == [[], [6]]  # .6666666...
@@ -105,3 +221,37 @@ def test_decimate():
     # Not really intended for improper fractions
     assert util.decimate(15, 8) == [[18, 7, 5], []]  # 1.875
     assert util.decimate(4, 3) == [[13], [3]]  # 1.3333...
+
+    # Other bases
+    assert util.decimate(1, 3, base=2) == [[], [0, 1]]  # .010101...
+    assert util.decimate(1, 10, base=2) == [[0], [0, 0, 1, 1]]
+    assert util.decimate(5, 6, base=12) == [[10], []]  # .A
+    with pytest.raises(ValueError, match='Invalid base'):
+        util.decimate(1, 3, base=37)
+
+
+def test_fraction_period():
+    assert util.fraction_period(1, 7) == (0, 6)
+    assert util.fraction_period(5, 6) == (1, 1)
+    assert util.fraction_period(15, 8) == (3, 0)
+    assert util.fraction_period(4, 3) == (1, 1)
+    assert util.fraction_period(0, 3) == (0, 0)
+    assert util.fraction_period(1, 10, base=2) == (1, 4)
+    # Without expanding a billion digits
+    assert util.fraction_period(1, 1000000007) == (0, 1000000006)
+    assert util.fraction_period(1, 2 ** 10 * 3 ** 5, base=6) == (10, 0)
+
+    assert util.multiplicative_order(10, 7) == 6
+    assert util.multiplicative_order(2, 1) == 1
+    assert util.multiplicative_order(3, 2 ** 20) == 2 ** 18
+    with pytest.raises(ValueError, match='No order'):
+        util.multiplicative_order(10, 6)
+
+
+def test_fraction_digits():
+    digits = util.fraction_digits(1, 7)
+    assert [next(digits) for _ in range(8)] == [1, 4, 2, 8, 5, 7, 1, 4]
+    assert list(util.fraction_digits(15, 8)) == [18, 7, 5]
+    assert list(util.fraction_digits(0, 8)) == []
+    digits = util.fraction_digits(1, 3, base=2)
+    assert [next(digits) for _ in range(4)] == [0, 1, 0, 1]